@@ -0,0 +1,146 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (AuthenticationFailed,
+                                                 InvalidToken)
+from rest_framework_simplejwt.settings import api_settings
+
+from users.common import TOKEN_USER_CLAIMS
+
+USER_CACHE_KEY = 'auth-user:{}'
+TOKEN_VERSION_CACHE_KEY = 'auth-token-version:{}'
+USER_CACHE_DEFAULTS = {
+    'TIMEOUT': 60,
+    'STATELESS': False,
+}
+USER_SNAPSHOT_FIELDS = (
+    'id', 'username', 'role', 'is_superuser', 'is_active', 'token_version'
+)
+
+
+def get_user_cache_key(user_id):
+    return USER_CACHE_KEY.format(user_id)
+
+
+def get_token_version_cache_key(user_id):
+    return TOKEN_VERSION_CACHE_KEY.format(user_id)
+
+
+def invalidate_cached_user(user_id):
+    cache.delete_many([
+        get_user_cache_key(user_id),
+        get_token_version_cache_key(user_id),
+    ])
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication, берущая пользователя из кэша.
+
+    В кэше хранится компактный снимок полей, нужных для проверки прав
+    (``USER_SNAPSHOT_FIELDS``). Остальные поля у пользователя отложены
+    и загружаются из БД только при обращении к ним. Снимок удаляется
+    при сохранении и удалении пользователя и живёт не дольше ``TIMEOUT``.
+
+    С ``STATELESS`` пользователь собирается из claims токена, а из кэша
+    берётся только версия токенов пользователя: токены, выданные до
+    понижения прав, отклоняются. Версия тоже кэшируется на ``TIMEOUT``,
+    поэтому без общего кэша другие процессы замечают понижение прав
+    с этой задержкой.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Для проверки нужен хэш пароля, которого нет в снимке.
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _('Token contained no recognizable user identification')
+            )
+
+        if self.get_cache_settings()['STATELESS'] and all(
+            claim in validated_token for claim in TOKEN_USER_CLAIMS
+        ):
+            self.check_token_version(
+                validated_token, self.get_token_version(user_id)
+            )
+            snapshot = {
+                'id': user_id,
+                'is_active': True,
+                **{
+                    claim: validated_token[claim]
+                    for claim in TOKEN_USER_CLAIMS
+                },
+            }
+            return self.build_user(snapshot)
+
+        snapshot = self.get_snapshot(user_id)
+        if not snapshot['is_active']:
+            raise AuthenticationFailed(
+                _('User is inactive'), code='user_inactive'
+            )
+        self.check_token_version(validated_token, snapshot['token_version'])
+        return self.build_user(snapshot)
+
+    def get_snapshot(self, user_id):
+        key = get_user_cache_key(user_id)
+        snapshot = cache.get(key)
+        if snapshot is None:
+            snapshot = (
+                self.user_model.objects
+                .filter(**{api_settings.USER_ID_FIELD: user_id})
+                .values(*USER_SNAPSHOT_FIELDS)
+                .first()
+            )
+            if snapshot is None:
+                raise AuthenticationFailed(
+                    _('User not found'), code='user_not_found'
+                )
+            cache.set(key, snapshot, self.get_cache_settings()['TIMEOUT'])
+        return snapshot
+
+    def get_token_version(self, user_id):
+        key = get_token_version_cache_key(user_id)
+        version = cache.get(key)
+        if version is None:
+            version = (
+                self.user_model.objects
+                .filter(**{api_settings.USER_ID_FIELD: user_id})
+                .values_list('token_version', flat=True)
+                .first()
+            )
+            if version is None:
+                raise AuthenticationFailed(
+                    _('User not found'), code='user_not_found'
+                )
+            # Сброс ключа при сохранении пользователя виден только кэшу
+            # этого процесса, поэтому версия живёт не дольше TIMEOUT.
+            cache.set(key, version, self.get_cache_settings()['TIMEOUT'])
+        return version
+
+    @staticmethod
+    def check_token_version(validated_token, version):
+        # Токены без версии выданы до её появления и считаются нулевыми.
+        if validated_token.get('token_version', 0) != version:
+            raise AuthenticationFailed(
+                'Токен отозван.', code='token_revoked'
+            )
+
+    def build_user(self, snapshot):
+        # from_db ожидает значения в порядке полей модели.
+        field_names = [
+            field.attname for field in self.user_model._meta.concrete_fields
+            if field.attname in snapshot
+        ]
+        return self.user_model.from_db(
+            None, field_names, [snapshot[name] for name in field_names]
+        )
+
+    @staticmethod
+    def get_cache_settings():
+        return {
+            **USER_CACHE_DEFAULTS,
+            **getattr(settings, 'AUTH_USER_CACHE', {}),
+        }
@@ -0,0 +1,216 @@
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from heapq import merge
+
+from django.db import connections
+
+from api.cache import bump_generation, get_generations
+from reviews.models import Category, Genre, Title
+
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 50
+
+
+def normalize(text):
+    return unicodedata.normalize('NFKC', text).casefold().replace('ё', 'е')
+
+
+class AutocompleteIndex:
+    """Отсортированный в памяти индекс префиксов названий.
+
+    Для каждого произведения, жанра и категории в индекс попадают
+    нормализованное название и его хвосты с начала каждого слова, поэтому
+    «мир» находит «Война и мир». У каждого вида объектов свой
+    отсортированный список; поиск — двоичный по спискам запрошенных видов
+    со слиянием результатов и не обращается к БД.
+
+    Индекс обновляется сигналами сохранения и удаления. Изменения из других
+    процессов замечаются по собственным поколениям индекса в ``api.cache``
+    (``GENERATION_SCOPE``): их сдвигают только изменения названий, а не
+    любая запись в модели, например смена жанров произведения. Если
+    поколения разошлись с индексом, его перестраивает один фоновый поток,
+    а запросы до конца перестройки получают прежние подсказки. Только самое
+    первое построение выполняется в запросе: отдавать до него нечего.
+    """
+
+    MODELS = {
+        'title': Title,
+        'genre': Genre,
+        'category': Category,
+    }
+
+    GENERATION_SCOPE = 'autocomplete'
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.build_lock = threading.Lock()
+        self.builder = None
+        self.clear()
+
+    @property
+    def models(self):
+        return tuple(self.MODELS.values())
+
+    @staticmethod
+    def get_keys(name):
+        normalized = normalize(name)
+        words = normalized.split()
+        return {
+            ' '.join(words[position:]) for position in range(len(words))
+        }
+
+    @classmethod
+    def get_kind(cls, model):
+        for kind, kind_model in cls.MODELS.items():
+            if kind_model is model:
+                return kind
+        return None
+
+    def clear(self):
+        self.wait()
+        with self.lock:
+            self.entries = {kind: [] for kind in self.MODELS}
+            self.items = {}
+            self.generations = None
+            self.ready = False
+
+    def get_generations(self):
+        return get_generations(*self.models, scope=self.GENERATION_SCOPE)
+
+    def ensure_fresh(self):
+        generations = self.get_generations()
+        if generations == self.generations:
+            return
+        if not self.ready:
+            # Остальные запросы ждут первое построение на блокировке.
+            with self.build_lock:
+                if not self.ready:
+                    self.rebuild(generations)
+            return
+        if self.build_lock.acquire(blocking=False):
+            self.builder = threading.Thread(
+                target=self.rebuild_in_background, args=(generations,),
+                daemon=True
+            )
+            self.builder.start()
+
+    def rebuild_in_background(self, generations):
+        try:
+            self.rebuild(generations)
+        finally:
+            # Поток открыл собственные соединения с БД.
+            connections.close_all()
+            self.build_lock.release()
+
+    def wait(self):
+        """Дожидается фоновой перестройки, если она идёт."""
+        builder = self.builder
+        if builder is not None:
+            builder.join()
+
+    def rebuild(self, generations):
+        entries = {kind: [] for kind in self.MODELS}
+        items = {}
+        for kind, model in self.MODELS.items():
+            fields = ('pk', 'name') if model is Title else (
+                'pk', 'name', 'slug'
+            )
+            for values in model.objects.values_list(*fields):
+                item = dict(zip(('id', 'name', 'slug'), values), type=kind)
+                keys = self.get_keys(item['name'])
+                entries[kind].extend((key, item['id']) for key in keys)
+                items[kind, item['id']] = (item, keys)
+        for kind_entries in entries.values():
+            kind_entries.sort()
+        with self.lock:
+            self.entries = entries
+            self.items = items
+            self.generations = generations
+            self.ready = True
+
+    def update(self, instance):
+        kind = self.get_kind(type(instance))
+        with self.lock:
+            bump_generation(type(instance), scope=self.GENERATION_SCOPE)
+            if not self.ready:
+                return
+            self.discard(kind, instance.pk)
+            item = {'id': instance.pk, 'name': instance.name, 'type': kind}
+            if kind != 'title':
+                item['slug'] = instance.slug
+            keys = self.get_keys(instance.name)
+            for key in keys:
+                insort(self.entries[kind], (key, instance.pk))
+            self.items[kind, instance.pk] = (item, keys)
+            self.advance_generation(type(instance))
+
+    def remove(self, model, pk):
+        kind = self.get_kind(model)
+        with self.lock:
+            bump_generation(model, scope=self.GENERATION_SCOPE)
+            if not self.ready:
+                return
+            self.discard(kind, pk)
+            self.advance_generation(model)
+
+    def discard(self, kind, pk):
+        item = self.items.pop((kind, pk), None)
+        if item is None:
+            return
+        entries = self.entries[kind]
+        for key in item[1]:
+            position = bisect_left(entries, (key, pk))
+            if position < len(entries) and entries[position] == (key, pk):
+                del entries[position]
+
+    def advance_generation(self, model):
+        # Индекс уже учёл изменение, поэтому принимает новое поколение,
+        # только если с момента построения менялась лишь эта модель
+        # и ровно один раз. Иначе его перестроит ensure_fresh.
+        if self.generations is None:
+            return
+        generations = self.get_generations()
+        expected = tuple(
+            generation + 1 if indexed_model is model else generation
+            for indexed_model, generation in zip(
+                self.models, self.generations
+            )
+        )
+        if generations == expected:
+            self.generations = generations
+        else:
+            self.generations = None
+
+    def iter_matches(self, kind, prefix):
+        entries = self.entries[kind]
+        position = bisect_left(entries, (prefix,))
+        while position < len(entries):
+            key, pk = entries[position]
+            if not key.startswith(prefix):
+                return
+            yield key, kind, pk
+            position += 1
+
+    def search(self, prefix, limit=AUTOCOMPLETE_LIMIT, kinds=None):
+        prefix = normalize(prefix).strip()
+        if not prefix:
+            return []
+        self.ensure_fresh()
+        results, seen = [], set()
+        with self.lock:
+            matches = merge(*(
+                self.iter_matches(kind, prefix) for kind in self.MODELS
+                if not kinds or kind in kinds
+            ))
+            for _, kind, pk in matches:
+                if (kind, pk) in seen:
+                    continue
+                seen.add((kind, pk))
+                results.append(self.items[kind, pk][0])
+                if len(results) == limit:
+                    break
+        return results
+
+
+autocomplete_index = AutocompleteIndex()
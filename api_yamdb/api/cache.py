@@ -0,0 +1,125 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.utils.module_loading import import_string
+
+GENERATION_KEY = 'generation:{}'
+RESPONSE_CACHE_DEFAULTS = {
+    'BACKEND': 'api.cache.LRUCacheBackend',
+    'OPTIONS': {},
+    'TIMEOUT': 60,
+}
+
+
+def get_generation_key(model, scope=None):
+    label = model._meta.label_lower
+    return GENERATION_KEY.format(f'{scope}:{label}' if scope else label)
+
+
+def get_generations(*models, scope=None):
+    """Возвращает текущие поколения данных моделей в порядке аргументов.
+
+    Потерянный счётчик начинается заново со значения времени, поэтому
+    после вытеснения из кэша старые поколения не повторяются. ``scope``
+    выбирает отдельные счётчики для данных, которые меняются реже модели.
+    """
+    keys = [get_generation_key(model, scope) for model in models]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, time.time_ns(), timeout=None)
+            generations[key] = cache.get(key)
+    return tuple(generations[key] for key in keys)
+
+
+def bump_generation(model, scope=None):
+    """Делает устаревшими все кэшированные данные, зависящие от модели."""
+    key = get_generation_key(model, scope)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def get_query_digest(request, exclude=()):
+    """Хэш параметров запроса, не зависящий от их порядка."""
+    params = sorted(
+        (name, sorted(values))
+        for name, values in request.query_params.lists()
+        if name not in exclude
+    )
+    return hashlib.md5(repr(params).encode()).hexdigest()
+
+
+class LRUCacheBackend:
+    """Кэш ответов в памяти процесса с вытеснением давних записей."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        expires_at = None if timeout is None else time.monotonic() + timeout
+        with self.lock:
+            self.entries[key] = (value, expires_at)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class DjangoCacheBackend:
+    """Кэш ответов в общем для процессов кэше Django из ``CACHES``."""
+
+    def __init__(self, alias='default'):
+        self.cache = caches[alias]
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value, timeout=None):
+        self.cache.set(key, value, timeout)
+
+    def clear(self):
+        self.cache.clear()
+
+
+def get_response_cache_settings():
+    return {
+        **RESPONSE_CACHE_DEFAULTS,
+        **getattr(settings, 'RESPONSE_CACHE', {}),
+    }
+
+
+_response_cache = None
+
+
+def get_response_cache():
+    global _response_cache
+    if _response_cache is None:
+        config = get_response_cache_settings()
+        options = {
+            name.lower(): value for name, value in config['OPTIONS'].items()
+        }
+        _response_cache = import_string(config['BACKEND'])(**options)
+    return _response_cache
@@ -1,12 +1,182 @@
 import django_filters
+from django.db.models import (Case, Exists, F, IntegerField, OuterRef, Value,
+                              When)
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
 
-from reviews.models import Title
+from api.cache import get_generations
+from reviews.constants import SEARCH_MAX_RESULTS
+from reviews.models import Category, Genre, Title
+from reviews.search import get_search_backend
+
+
+class SlugResolver:
+    """Кэш соответствия slug → id для маленьких справочников.
+
+    Таблица загружается целиком одним запросом и перечитывается, когда
+    меняется поколение данных модели из ``api.cache``.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.ids = {}
+        self.generation = None
+
+    def resolve(self, slugs):
+        """Возвращает id для известных slug; неизвестные пропускаются."""
+        generation, = get_generations(self.model)
+        if generation != self.generation:
+            # Словарь заменяется целиком, поэтому чтение из других
+            # потоков не видит его частично заполненным.
+            self.ids = dict(self.model.objects.values_list('slug', 'pk'))
+            self.generation = generation
+        ids = self.ids
+        return [ids[slug] for slug in slugs if slug in ids]
+
+
+genre_slugs = SlugResolver(Genre)
+category_slugs = SlugResolver(Category)
+
+
+def split_slugs(value):
+    return list(dict.fromkeys(
+        slug.strip() for slug in value.split(',') if slug.strip()
+    ))
 
 
 class TitleFilter(django_filters.FilterSet):
-    genre = django_filters.CharFilter(field_name='genre__slug')
-    category = django_filters.CharFilter(field_name='category__slug')
+    """Фильтры списка произведений.
+
+    ``genre`` и ``category`` принимают один slug или несколько через
+    запятую. Произведение подходит, если у него есть любой из жанров,
+    а с ``genre_match=all`` — все перечисленные жанры. Фильтры по рейтингу
+    используют хранимый столбец ``rating``, а не агрегат по отзывам.
+    """
+
+    GENRE_MATCH_CHOICES = (('any', 'Любой из жанров'), ('all', 'Все жанры'))
+
+    year_min = django_filters.NumberFilter(
+        field_name='year', lookup_expr='gte'
+    )
+    year_max = django_filters.NumberFilter(
+        field_name='year', lookup_expr='lte'
+    )
+    rating_min = django_filters.NumberFilter(
+        field_name='rating', lookup_expr='gte'
+    )
+    rating_max = django_filters.NumberFilter(
+        field_name='rating', lookup_expr='lte'
+    )
+    genre = django_filters.CharFilter(method='filter_genre')
+    genre_match = django_filters.ChoiceFilter(
+        choices=GENRE_MATCH_CHOICES, method='filter_nothing'
+    )
+    category = django_filters.CharFilter(method='filter_category')
 
     class Meta:
         model = Title
         fields = ('name', 'year', 'category', 'genre')
+
+    def filter_nothing(self, queryset, name, value):
+        return queryset
+
+    def filter_genre(self, queryset, name, value):
+        slugs = split_slugs(value)
+        genre_ids = genre_slugs.resolve(slugs)
+        through = Title.genre.through.objects.filter(title_id=OuterRef('pk'))
+        if self.form.cleaned_data.get('genre_match') == 'all':
+            if len(genre_ids) < len(slugs):
+                return queryset.none()
+            for genre_id in genre_ids:
+                queryset = queryset.filter(
+                    Exists(through.filter(genre_id=genre_id))
+                )
+            return queryset
+        if not genre_ids:
+            return queryset.none()
+        return queryset.filter(Exists(through.filter(genre_id__in=genre_ids)))
+
+    def filter_category(self, queryset, name, value):
+        category_ids = category_slugs.resolve(split_slugs(value))
+        if not category_ids:
+            return queryset.none()
+        return queryset.filter(category_id__in=category_ids)
+
+
+class NullsLastOrderingFilter(OrderingFilter):
+    """OrderingFilter, ставящий пустые значения в конец списка.
+
+    Без явного указания положение NULL зависит от СУБД: на PostgreSQL
+    при сортировке по убыванию они идут первыми. Поля с пустыми
+    значениями перечисляются в ``nulls_last_fields`` view.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        nulls_last_fields = getattr(view, 'nulls_last_fields', ())
+        if not ordering or not nulls_last_fields:
+            return ordering
+        return [
+            self.get_nulls_last(field) if field.lstrip('-')
+            in nulls_last_fields else field
+            for field in ordering
+        ]
+
+    @staticmethod
+    def get_nulls_last(field):
+        if field.startswith('-'):
+            return F(field[1:]).desc(nulls_last=True)
+        return F(field).asc(nulls_last=True)
+
+
+class TitleSearchFilter(BaseFilterBackend):
+    """Полнотекстовый поиск произведений по ``?search=``.
+
+    Ищет по названию, описанию, жанрам и категории через индекс
+    ``reviews.search``. Без явного ``?ordering=`` результаты
+    упорядочены по релевантности, поэтому фильтр должен стоять
+    в ``filter_backends`` после ``OrderingFilter``.
+
+    В выдачу попадают не больше ``SEARCH_MAX_RESULTS`` самых релевантных
+    произведений. Было ли что-то отброшено, фильтр записывает
+    в ``search_truncated`` view.
+    """
+
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        # Лишний id показывает, что совпадений больше предела.
+        title_ids = get_search_backend(queryset.db).search(
+            query, limit=SEARCH_MAX_RESULTS + 1
+        )
+        view.search_truncated = len(title_ids) > SEARCH_MAX_RESULTS
+        title_ids = title_ids[:SEARCH_MAX_RESULTS]
+        queryset = queryset.filter(pk__in=title_ids)
+        if OrderingFilter.ordering_param in request.query_params:
+            return queryset
+        if not title_ids:
+            return queryset.order_by('pk')
+        return queryset.order_by(
+            Case(
+                *(
+                    When(pk=title_id, then=Value(position))
+                    for position, title_id in enumerate(title_ids)
+                ),
+                output_field=IntegerField()
+            )
+        )
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.search_param,
+            'required': False,
+            'in': 'query',
+            'description': (
+                'Поиск по названию, описанию, жанрам и категории. '
+                f'Возвращает не больше {SEARCH_MAX_RESULTS} самых '
+                'релевантных произведений.'
+            ),
+            'schema': {'type': 'string'},
+        }]
@@ -0,0 +1,304 @@
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Manager, OuterRef, Prefetch, Subquery
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from rest_framework import serializers, status
+from rest_framework.relations import ManyRelatedField
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from api.cache import (
+    get_generations,
+    get_query_digest,
+    get_response_cache,
+    get_response_cache_settings,
+)
+from api.pagination import FeedPagination, encode_feed_cursor
+from reviews.models import Title
+
+
+def get_serialized_columns(model, serializer):
+    """Возвращает поля модели, которые читает сериализатор."""
+    columns = [model._meta.pk.attname]
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*' or '.' in field.source:
+            continue
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            continue
+        if model_field.concrete and not model_field.many_to_many:
+            columns.append(model_field.attname)
+    return tuple(dict.fromkeys(columns))
+
+
+@lru_cache(maxsize=None)
+def build_query_plan(model, serializer_class):
+    """Строит план загрузки связей по объявленным полям сериализатора.
+
+    Возвращает кортеж из полей для ``select_related`` и описаний
+    ``prefetch_related`` вида ``(lookup, модель, колонки)``.
+    """
+    select_related = []
+    prefetch_related = []
+    for field in serializer_class().fields.values():
+        if field.write_only or field.source == '*' or '.' in field.source:
+            continue
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            continue
+        if not model_field.is_relation:
+            continue
+        related_model = model_field.related_model
+        if model_field.many_to_one or model_field.one_to_one:
+            select_related.append(field.source)
+            continue
+        if isinstance(field, serializers.ListSerializer):
+            columns = get_serialized_columns(related_model, field.child)
+        elif isinstance(field, ManyRelatedField):
+            columns = (related_model._meta.pk.attname,)
+        else:
+            continue
+        if model_field.one_to_many:
+            # Для обратной связи нужен внешний ключ на родителя,
+            # иначе prefetch не сможет разложить объекты по владельцам.
+            columns += (model_field.field.attname,)
+        prefetch_related.append((field.source, related_model, columns))
+    return tuple(select_related), tuple(prefetch_related)
+
+
+def plan_queryset(queryset, serializer_class):
+    """Добавляет к запросу загрузку связей, нужных сериализатору."""
+    select_related, prefetch_related = build_query_plan(
+        queryset.model, serializer_class
+    )
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*(
+            Prefetch(lookup, queryset=model._default_manager.only(*columns))
+            for lookup, model, columns in prefetch_related
+        ))
+    return queryset
+
+
+class QueryPlanMixin:
+    """Загружает связи сериализатора фиксированным числом запросов."""
+
+    query_plan_serializer_class = None
+
+    def get_queryset(self):
+        return plan_queryset(
+            super().get_queryset(),
+            self.query_plan_serializer_class or self.get_serializer_class()
+        )
+
+
+class ExpandedFeedField(serializers.Field):
+    """Первые ``limit`` id ленты связанных объектов.
+
+    Значение — ``{'results': [id, ...], 'next': ссылка}``, где ``next``
+    ведёт на ленту ``url_name`` в режиме курсора сразу после последнего
+    показанного объекта или равно ``None``, если продолжения нет.
+    У списка срезы всех объектов страницы загружает одним запросом
+    ``ExpandableListSerializer``.
+    """
+
+    ordering = ('-pub_date', '-id')
+
+    def __init__(self, related_name, url_name, get_url_kwargs, limit,
+                 **kwargs):
+        kwargs.update(source='*', read_only=True)
+        super().__init__(**kwargs)
+        self.related_name = related_name
+        self.url_name = url_name
+        self.get_url_kwargs = get_url_kwargs
+        self.limit = limit
+
+    @property
+    def cache_name(self):
+        return f'_expanded_{self.field_name}'
+
+    def preload(self, instances):
+        foreign_key = getattr(type(instances[0]), self.related_name).field
+        parent_attname = foreign_key.attname
+        manager = foreign_key.model._default_manager
+        # Лишний объект в срезе показывает, что у ленты есть продолжение.
+        latest = manager.filter(
+            **{parent_attname: OuterRef(parent_attname)}
+        ).order_by(*self.ordering).values('pk')[:self.limit + 1]
+        slices = {instance.pk: [] for instance in instances}
+        rows = manager.filter(
+            **{f'{parent_attname}__in': list(slices)},
+            pk__in=Subquery(latest)
+        ).order_by(parent_attname, *self.ordering).values_list(
+            parent_attname, 'pk', 'pub_date'
+        )
+        for parent_id, pk, pub_date in rows:
+            slices[parent_id].append((pk, pub_date))
+        for instance in instances:
+            setattr(instance, self.cache_name, slices[instance.pk])
+
+    def to_representation(self, instance):
+        if not hasattr(instance, self.cache_name):
+            self.preload([instance])
+        items = getattr(instance, self.cache_name)
+        return {
+            'results': [pk for pk, _ in items[:self.limit]],
+            'next': (
+                self.get_next_link(instance, *items[self.limit - 1])
+                if len(items) > self.limit else None
+            ),
+        }
+
+    def get_next_link(self, instance, pk, pub_date):
+        url = reverse(self.url_name, kwargs=self.get_url_kwargs(instance))
+        request = self.context.get('request')
+        if request is not None:
+            url = request.build_absolute_uri(url)
+        return replace_query_param(
+            url, FeedPagination.cursor_query_param,
+            encode_feed_cursor(pub_date, pk)
+        )
+
+
+class ExpandableListSerializer(serializers.ListSerializer):
+    """Загружает раскрытые поля всех объектов списка вместе."""
+
+    def to_representation(self, data):
+        instances = list(data.all() if isinstance(data, Manager) else data)
+        if instances:
+            self.child.preload_expanded(instances)
+        return super().to_representation(instances)
+
+
+class ExpandableFieldsMixin:
+    """Отдаёт поля из ``Meta.expandable_fields`` только по ``?expand=``.
+
+    Чтобы раскрытые ``ExpandedFeedField`` списка загружались одним
+    запросом, в ``Meta`` указывается
+    ``list_serializer_class = ExpandableListSerializer``.
+    """
+
+    def preload_expanded(self, instances):
+        for field in self.fields.values():
+            if isinstance(field, ExpandedFeedField):
+                field.preload(instances)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        expandable_fields = getattr(self.Meta, 'expandable_fields', ())
+        for field_name in set(expandable_fields) - self.get_expand():
+            self.fields.pop(field_name, None)
+
+    def get_expand(self):
+        request = self.context.get('request')
+        if request is None:
+            return set()
+        return {
+            name.strip()
+            for name in request.query_params.get('expand', '').split(',')
+            if name.strip()
+        }
+
+
+class ListResponseCacheMixin:
+    """Кэширует ответы ``list``.
+
+    Ключ строится из пути, параметров запроса и поколений моделей из
+    ``response_cache_models``: запись в любую из них меняет ключ, и
+    устаревшие ответы больше не читаются.
+    """
+
+    response_cache_models = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def get_response_cache_key(self, request):
+        generations = '.'.join(
+            map(str, get_generations(*self.response_cache_models))
+        )
+        return (
+            f'response:{request.path}:{generations}:'
+            f'{get_query_digest(request)}'
+        )
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        response_cache = get_response_cache()
+        key = self.get_response_cache_key(request)
+        data = response_cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response_cache.set(
+                key, response.data, get_response_cache_settings()['TIMEOUT']
+            )
+        return response
+
+
+class ResponseCacheMixin(ListResponseCacheMixin):
+    """Кэширует ответы ``list`` и ``retrieve``."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class ConditionalGetMixin:
+    """Поддержка ``If-None-Match`` и ``If-Modified-Since``.
+
+    Валидатор — версия и время изменения произведения, которое находится
+    по ``conditional_lookups``: отображению полей ``Title`` на аргументы
+    URL. Если аргументов нет в URL, запрос обрабатывается как обычно.
+    """
+
+    conditional_lookups = {'pk': 'title_id'}
+
+    def list(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def get_validator(self):
+        lookups = {}
+        for field, kwarg in self.conditional_lookups.items():
+            if kwarg not in self.kwargs:
+                return None
+            lookups[field] = self.kwargs[kwarg]
+        return (
+            Title.objects.filter(**lookups)
+            .values_list('version', 'modified_at')
+            .first()
+        )
+
+    def get_conditional_response(self, handler, request, *args, **kwargs):
+        validator = self.get_validator()
+        if validator is None:
+            return handler(request, *args, **kwargs)
+        version, modified_at = validator
+        etag = quote_etag(f'{version}.{modified_at.timestamp()}')
+        last_modified = int(modified_at.timestamp())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (status.HTTP_200_OK,
+                                    status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
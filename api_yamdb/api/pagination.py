@@ -0,0 +1,226 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from datetime import datetime
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (LimitOffsetPagination,
+                                       PageNumberPagination)
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from api.cache import get_generations, get_query_digest
+
+COUNT_CACHE_DEFAULTS = {
+    'TIMEOUT': 300,
+    'ESTIMATE_THRESHOLD': 100000,
+}
+
+
+def encode_feed_cursor(pub_date, pk):
+    """Курсор ``FeedPagination``, указывающий на объекты после данного."""
+    position = f'{pub_date.isoformat()}|{pk}'
+    return urlsafe_b64encode(position.encode()).decode()
+
+
+class LookaheadPage(Page):
+    """Страница, знающая о следующей по лишней прочитанной строке."""
+
+    def __init__(self, object_list, number, paginator, has_more):
+        super().__init__(object_list, number, paginator)
+        self.has_more = has_more
+
+    def has_next(self):
+        return self.has_more
+
+
+class CountLoaderPaginator(Paginator):
+    """Paginator, получающий общее количество объектов извне.
+
+    Количество может браться из кэша и отставать от данных, поэтому
+    страница им не ограничивается: читается на строку больше размера
+    страницы, и по этой строке решается, есть ли следующая.
+    """
+
+    def __init__(self, *args, count_loader, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.count_loader = count_loader
+
+    @cached_property
+    def count(self):
+        return self.count_loader(self.object_list)
+
+    def validate_number(self, number):
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        object_list = list(
+            self.object_list[bottom:bottom + self.per_page + 1]
+        )
+        if not object_list and number > 1:
+            raise EmptyPage('That page contains no results')
+        return LookaheadPage(
+            object_list[:self.per_page], number, self,
+            has_more=len(object_list) > self.per_page
+        )
+
+
+class CachedCountPagination(PageNumberPagination):
+    """PageNumberPagination с кэшированием ``count``.
+
+    Количество кэшируется по пути и нормализованным параметрам фильтрации
+    и сбрасывается при записи в модели из ``count_cache_models`` view
+    (по умолчанию — модель queryset). На PostgreSQL выше
+    ``ESTIMATE_THRESHOLD`` вместо ``COUNT(*)`` берётся оценка планировщика.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.django_paginator_class = partial(
+            CountLoaderPaginator,
+            count_loader=partial(self.get_count, request=request, view=view)
+        )
+        return super().paginate_queryset(queryset, request, view)
+
+    @staticmethod
+    def get_count_settings():
+        return {
+            **COUNT_CACHE_DEFAULTS,
+            **getattr(settings, 'PAGINATION_COUNT_CACHE', {}),
+        }
+
+    def get_count(self, queryset, request, view=None):
+        key = self.get_count_cache_key(queryset, request, view)
+        count = cache.get(key)
+        if count is None:
+            count = self.count_queryset(queryset)
+            cache.set(key, count, self.get_count_settings()['TIMEOUT'])
+        return count
+
+    def get_count_cache_key(self, queryset, request, view=None):
+        models = getattr(view, 'count_cache_models', None) or (
+            queryset.model,
+        )
+        digest = get_query_digest(
+            request,
+            exclude=(self.page_query_param, self.page_size_query_param)
+        )
+        generations = '.'.join(map(str, get_generations(*models)))
+        return f'count:{request.path}:{generations}:{digest}'
+
+    def count_queryset(self, queryset):
+        threshold = self.get_count_settings()['ESTIMATE_THRESHOLD']
+        if threshold and connections[queryset.db].vendor == 'postgresql':
+            estimate = self.estimate_count(queryset)
+            if estimate > threshold:
+                return estimate
+        return queryset.count()
+
+    @staticmethod
+    def estimate_count(queryset):
+        sql, params = queryset.order_by().query.sql_with_params()
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        return int(plan[0]['Plan']['Plan Rows'])
+
+
+class FeedPagination(LimitOffsetPagination):
+    """Limit/offset-пагинация с режимом курсора по ``(pub_date, id)``.
+
+    Курсорный режим включается параметром ``?pagination=cursor`` или
+    переданным ``?cursor=``. Страница выбирается условием по ключу, а не
+    ``OFFSET``, и не требует ``COUNT(*)``, поэтому стоимость запроса не
+    зависит от глубины прокрутки.
+    """
+
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    ordering = ('-pub_date', '-id')
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def use_cursor(self, request):
+        return (
+            self.cursor_query_param in request.query_params
+            or request.query_params.get(self.mode_query_param)
+            == self.cursor_mode
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.use_cursor(request)
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.limit = self.get_limit(request)
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        if position is not None:
+            pub_date, pk = position
+            queryset = queryset.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, id__lt=pk)
+            )
+        page = list(queryset[:self.limit + 1])
+        self.has_next = len(page) > self.limit
+        page = page[:self.limit]
+        self.last = page[-1] if page else None
+        return page
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_next_cursor_link(),
+            'results': data,
+        })
+
+    def get_next_cursor_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.offset_query_param)
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.last)
+        )
+
+    def encode_cursor(self, obj):
+        return encode_feed_cursor(obj.pub_date, obj.pk)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            pub_date, pk = (
+                urlsafe_b64decode(encoded.encode()).decode().split('|')
+            )
+            return datetime.fromisoformat(pub_date), int(pk)
+        except (BinasciiError, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters.append({
+            'name': self.cursor_query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Курсор следующей страницы.',
+            'schema': {'type': 'string'},
+        })
+        return parameters
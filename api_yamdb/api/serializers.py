@@ -1,9 +1,13 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.shortcuts import get_object_or_404
 from django.core.validators import MinValueValidator, MaxValueValidator
 from rest_framework import serializers
-from rest_framework_simplejwt.tokens import RefreshToken
 
+from api.mixins import (
+    ExpandableFieldsMixin,
+    ExpandableListSerializer,
+    ExpandedFeedField,
+)
 from users.common import UserService
 from users.mixin import UsernameValidationMixin
 from users.models import User
@@ -11,6 +15,7 @@ from reviews.models import Category, Comment, Genre, Review, Title
 from reviews.constants import (
     MIN_VALUE_FOR_SCORE,
     MAX_VALUE_FOR_SCORE,
+    MAX_EXPANDED_ITEMS,
     MAX_NAMES_STRINGS,
     MAX_CONFORMATION_CODE_STRING,
     MAX_EMAIL_STRING
@@ -29,15 +34,23 @@ class GenreSerializer(serializers.ModelSerializer):
         fields = ('name', 'slug')
 
 
-class TitleReadOnlySerializer(serializers.ModelSerializer):
+class TitleReadOnlySerializer(ExpandableFieldsMixin,
+                              serializers.ModelSerializer):
     rating = serializers.IntegerField(read_only=True, default=None)
     category = CategorySerializer()
     genre = GenreSerializer(many=True)
+    reviews = ExpandedFeedField(
+        'reviews', 'reviews-list',
+        lambda title: {'title_id': title.pk},
+        limit=MAX_EXPANDED_ITEMS
+    )
 
     class Meta:
         model = Title
-        fields = ('reviews', 'id', 'name', 'year', 'description',
-                  'category', 'genre', 'rating')
+        fields = ('reviews', 'reviews_count', 'id', 'name', 'year',
+                  'description', 'category', 'genre', 'rating')
+        expandable_fields = ('reviews',)
+        list_serializer_class = ExpandableListSerializer
 
 
 class TitleSerializerForWrite(serializers.ModelSerializer):
@@ -53,8 +66,7 @@ class TitleSerializerForWrite(serializers.ModelSerializer):
 
     class Meta:
         model = Title
-        fields = ('reviews', 'id', 'name', 'year',
-                  'description', 'category', 'genre')
+        fields = ('id', 'name', 'year', 'description', 'category', 'genre')
 
     def validate_genre(self, value):
         if not value:
@@ -63,7 +75,7 @@ class TitleSerializerForWrite(serializers.ModelSerializer):
         return value
 
     def to_representation(self, instance):
-        return TitleReadOnlySerializer(instance).data
+        return TitleReadOnlySerializer(instance, context=self.context).data
 
 
 class CommentSerializer(serializers.ModelSerializer):
@@ -76,9 +88,15 @@ class CommentSerializer(serializers.ModelSerializer):
         read_only_fields = ('pub_date',)
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(slug_field='username',
                                           read_only=True)
+    comments = ExpandedFeedField(
+        'comments', 'comment-list',
+        lambda review: {'title_id': review.title_id, 'review_id': review.pk},
+        limit=MAX_EXPANDED_ITEMS
+    )
+    comments_count = serializers.IntegerField(read_only=True, default=0)
     score = serializers.IntegerField(
         validators=(
             MinValueValidator(
@@ -93,10 +111,12 @@ class ReviewSerializer(serializers.ModelSerializer):
     )
 
     class Meta:
-        fields = ('comments', 'id', 'text', 'author',
+        fields = ('comments', 'comments_count', 'id', 'text', 'author',
                   'pub_date', 'score')
         model = Review
         read_only_fields = ('pub_date',)
+        expandable_fields = ('comments',)
+        list_serializer_class = ExpandableListSerializer
 
     def validate(self, data):
         request = self.context['request']
@@ -121,19 +141,20 @@ class UserTokenSerializer(serializers.Serializer):
         username = data.get("username")
         confirmation_code = data.get("confirmation_code")
 
+        # Код гасится условным UPDATE одной колонки: из параллельных
+        # запросов с одним кодом токен получит только первый.
+        consumed = (
+            User.objects
+            .filter(username=username, confirmation_code=confirmation_code)
+            .exclude(confirmation_code="")
+            .update(confirmation_code="")
+        )
         user = get_object_or_404(User, username=username)
 
-        if (
-                not user.confirmation_code
-                or user.confirmation_code != confirmation_code
-        ):
+        if not consumed:
             raise serializers.ValidationError("Неверный код подтверждения")
 
-        user.confirmation_code = ""
-        user.save()
-
-        refresh = RefreshToken.for_user(user)
-        data["token"] = str(refresh.access_token)
+        data["token"] = UserService.create_access_token(user)
 
         return data
 
@@ -146,17 +167,24 @@ class SignUpSerializer(serializers.Serializer, UsernameValidationMixin):
         email = data.get("email")
         username = data.get("username")
 
-        user_exists = User.objects.filter(
-            models.Q(email=email) | models.Q(username=username))
-
-        if user_exists.exists():
-            if user_exists.filter(email=email, username=username).exists():
+        # Одним запросом получаем не больше двух пользователей:
+        # с таким email и с таким username.
+        candidates = list(
+            User.objects
+            .filter(models.Q(email=email) | models.Q(username=username))
+            .order_by()
+            .only("id", "email", "username")[:2]
+        )
+        self.existing_user = None
+        for user in candidates:
+            if user.email == email and user.username == username:
+                self.existing_user = user
                 return data
 
-        if user_exists.filter(email=email).exists():
+        if any(user.email == email for user in candidates):
             raise serializers.ValidationError({"email": "Email уже занят."})
 
-        if user_exists.filter(username=username).exists():
+        if candidates:
             raise serializers.ValidationError(
                 {"username": "Username уже занят."}
             )
@@ -164,12 +192,37 @@ class SignUpSerializer(serializers.Serializer, UsernameValidationMixin):
         return data
 
     def create(self, validated_data):
-        user, create = User.objects.get_or_create(**validated_data)
-        user.confirmation_code = UserService.create_confirmation_code()
-        user.save()
-        UserService.send_confirmation_email(user, user.confirmation_code)
+        confirmation_code = UserService.create_confirmation_code()
+        with transaction.atomic():
+            user = self.existing_user
+            if user is None:
+                user = self.create_user(validated_data, confirmation_code)
+            else:
+                User.objects.filter(pk=user.pk).update(
+                    confirmation_code=confirmation_code
+                )
+            UserService.queue_confirmation_email(user, confirmation_code)
         return validated_data
 
+    @staticmethod
+    def create_user(validated_data, confirmation_code):
+        try:
+            with transaction.atomic():
+                return User.objects.create(
+                    **validated_data, confirmation_code=confirmation_code
+                )
+        except IntegrityError:
+            # Пользователь с такими данными зарегистрировался параллельно.
+            user = User.objects.filter(**validated_data).first()
+            if user is None:
+                raise serializers.ValidationError(
+                    "Email или username уже заняты."
+                )
+            User.objects.filter(pk=user.pk).update(
+                confirmation_code=confirmation_code
+            )
+            return user
+
 
 class UserSerializer(serializers.ModelSerializer, UsernameValidationMixin):
     class Meta:
@@ -0,0 +1,57 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from api.authentication import invalidate_cached_user
+from api.autocomplete import autocomplete_index
+from api.cache import bump_generation
+from reviews.models import Category, Genre, Review, Title
+from users.models import User
+
+CACHED_MODELS = (Category, Genre, Review, Title, User)
+
+# Кэши сбрасываются только после фиксации транзакции: иначе параллельный
+# запрос успеет прочитать прежние строки и закэшировать их под новым
+# поколением. Вне транзакции on_commit вызывает функцию сразу.
+
+
+def data_changed(sender, using=None, **kwargs):
+    transaction.on_commit(partial(bump_generation, sender), using=using)
+
+
+def user_changed(sender, instance, using=None, **kwargs):
+    transaction.on_commit(
+        partial(invalidate_cached_user, instance.pk), using=using
+    )
+
+
+def autocomplete_item_saved(sender, instance, raw=False, using=None,
+                            **kwargs):
+    if not raw:
+        transaction.on_commit(
+            partial(autocomplete_index.update, instance), using=using
+        )
+
+
+def autocomplete_item_deleted(sender, instance, using=None, **kwargs):
+    # После удаления pk экземпляра обнуляется, поэтому передаётся сразу.
+    transaction.on_commit(
+        partial(autocomplete_index.remove, sender, instance.pk), using=using
+    )
+
+
+def title_genres_changed(sender, action, using=None, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        transaction.on_commit(partial(bump_generation, Title), using=using)
+
+
+for model in CACHED_MODELS:
+    post_save.connect(data_changed, sender=model)
+    post_delete.connect(data_changed, sender=model)
+for model in autocomplete_index.models:
+    post_save.connect(autocomplete_item_saved, sender=model)
+    post_delete.connect(autocomplete_item_deleted, sender=model)
+post_save.connect(user_changed, sender=User)
+post_delete.connect(user_changed, sender=User)
+m2m_changed.connect(title_genres_changed, sender=Title.genre.through)
@@ -0,0 +1,176 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+THROTTLE_KEY = 'throttle:{}:{}:{}'
+THROTTLE_BACKEND = 'api.throttling.LocalBucketBackend'
+
+
+def take_token(state, capacity, refill_rate, now):
+    """Списывает маркер из корзины.
+
+    Возвращает новое состояние корзины ``(маркеры, время)`` и сколько
+    секунд ждать, если маркеров не осталось (``None`` — запрос разрешён).
+    """
+    tokens, updated_at = state or (capacity, now)
+    tokens = min(capacity, tokens + (now - updated_at) * refill_rate)
+    if tokens >= 1:
+        return (tokens - 1, now), None
+    return (tokens, now), (1 - tokens) / refill_rate
+
+
+class LocalBucketBackend:
+    """Корзины в памяти процесса; подходит для одного узла."""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def consume(self, key, capacity, refill_rate):
+        with self.lock:
+            state, wait = take_token(
+                self.buckets.get(key), capacity, refill_rate,
+                time.monotonic()
+            )
+            self.buckets[key] = state
+            self.buckets.move_to_end(key)
+            while len(self.buckets) > self.max_entries:
+                self.buckets.popitem(last=False)
+        return wait
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+class CacheBucketBackend:
+    """Корзины в общем кэше Django; подходит для нескольких узлов.
+
+    Чтение и запись корзины не атомарны, поэтому при одновременных
+    запросах лимит может быть превышен на единицы запросов.
+    """
+
+    def __init__(self, alias='default'):
+        self.cache = caches[alias]
+
+    def consume(self, key, capacity, refill_rate):
+        state, wait = take_token(
+            self.cache.get(key), capacity, refill_rate, time.time()
+        )
+        # Полная корзина не отличается от отсутствующей.
+        self.cache.set(key, state, int(capacity / refill_rate) + 1)
+        return wait
+
+    def clear(self):
+        self.cache.clear()
+
+
+_backends = {}
+
+
+def get_throttle_backend():
+    path = getattr(settings, 'REST_FRAMEWORK', {}).get(
+        'THROTTLE_BACKEND', THROTTLE_BACKEND
+    )
+    if path not in _backends:
+        _backends[path] = import_string(path)()
+    return _backends[path]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Ограничение частоты запросов корзиной маркеров.
+
+    Частота берётся из ``DEFAULT_THROTTLE_RATES`` по ``throttle_scope``
+    view или ``scope`` класса: ``'10/hour'`` — корзина на 10 запросов,
+    пополняемая со скоростью 10 маркеров в час. Для каждого
+    идентификатора из ``get_idents`` заводится своя корзина, запрос
+    проходит, только если маркер нашёлся во всех.
+    """
+
+    scope = None
+
+    def get_scope(self, view):
+        return getattr(view, 'throttle_scope', None) or self.scope
+
+    def get_rate(self, scope):
+        try:
+            rate = api_settings.DEFAULT_THROTTLE_RATES[scope]
+        except KeyError:
+            raise ImproperlyConfigured(
+                f'Не задана частота запросов для "{scope}".'
+            )
+        num, period = rate.split('/')
+        duration = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
+        return int(num), int(num) / duration
+
+    def get_idents(self, request, view):
+        return [('ip', self.get_ident(request))]
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        scope = self.get_scope(view)
+        capacity, refill_rate = self.get_rate(scope)
+        backend = get_throttle_backend()
+        for kind, value in self.get_idents(request, view):
+            digest = hashlib.md5(str(value).lower().encode()).hexdigest()
+            self.wait_seconds = backend.consume(
+                THROTTLE_KEY.format(scope, kind, digest),
+                capacity, refill_rate
+            )
+            if self.wait_seconds is not None:
+                return False
+        return True
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class AuthThrottle(TokenBucketThrottle):
+    """Лимит на адрес клиента и на username/email из тела запроса."""
+
+    fields = ('username', 'email')
+
+    def get_idents(self, request, view):
+        idents = super().get_idents(request, view)
+        if not isinstance(request.data, Mapping):
+            # Тело не объект: ответ с ошибкой вернёт сериализатор.
+            return idents
+        for field in self.fields:
+            value = request.data.get(field)
+            if isinstance(value, str) and value:
+                idents.append((field, value))
+        return idents
+
+
+class SignUpThrottle(AuthThrottle):
+    scope = 'signup'
+
+
+class TokenObtainThrottle(AuthThrottle):
+    scope = 'token'
+    fields = ('username',)
+
+
+class WriteThrottle(TokenBucketThrottle):
+    """Лимит на изменяющие запросы пользователя; чтение не ограничено."""
+
+    def allow_request(self, request, view):
+        if request.method in SAFE_METHODS:
+            return True
+        return super().allow_request(request, view)
+
+    def get_idents(self, request, view):
+        if request.user.is_authenticated:
+            return [('user', request.user.pk)]
+        return super().get_idents(request, view)
@@ -3,6 +3,7 @@ from rest_framework.routers import DefaultRouter
 
 from api.views import (
     UserViewSet,
+    autocomplete_view,
     sign_up_view,
     get_token_obtain_pair_view,
 )
@@ -37,5 +38,6 @@ auth_urlpatterns = [
 ]
 urlpatterns = [
     path('v1/auth/', include(auth_urlpatterns)),
+    path('v1/autocomplete/', autocomplete_view, name='autocomplete'),
     path('v1/', include(v1_router.urls)),
 ]
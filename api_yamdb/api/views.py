@@ -1,18 +1,34 @@
+import json
+
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from django.db.models import Avg
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets, permissions, mixins, filters, status
-from rest_framework.pagination import (LimitOffsetPagination,
-                                       PageNumberPagination)
 from rest_framework.decorators import (
     api_view,
     permission_classes,
+    throttle_classes,
     action,
 )
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from .filters import TitleFilter
+from .autocomplete import (
+    AUTOCOMPLETE_LIMIT,
+    AUTOCOMPLETE_MAX_LIMIT,
+    autocomplete_index,
+)
+from .filters import NullsLastOrderingFilter, TitleFilter, TitleSearchFilter
+from .mixins import (
+    ConditionalGetMixin,
+    ListResponseCacheMixin,
+    QueryPlanMixin,
+    ResponseCacheMixin,
+)
+from .pagination import CachedCountPagination, FeedPagination
 from .permissions import (
     IsAdminOrReadOnly,
     IsAdminOrModeratorOrReadOnly,
@@ -30,11 +46,13 @@ from .serializers import (
     UserTokenSerializer,
     UserNoAdminSerializer,
 )
-from reviews.models import Category, Genre, Title, Review
+from .throttling import SignUpThrottle, TokenObtainThrottle, WriteThrottle
+from reviews.models import Category, Comment, Genre, Title, Review
 from users.models import Role, User
 
 
-class CategoryAndGenreViewSet(mixins.CreateModelMixin,
+class CategoryAndGenreViewSet(ListResponseCacheMixin,
+                              mixins.CreateModelMixin,
                               mixins.ListModelMixin,
                               mixins.DestroyModelMixin,
                               viewsets.GenericViewSet):
@@ -42,42 +60,103 @@ class CategoryAndGenreViewSet(mixins.CreateModelMixin,
     search_fields = ('name',)
     permission_classes = (IsAdminOrReadOnly,)
     lookup_field = 'slug'
-    pagination_class = PageNumberPagination
+    pagination_class = CachedCountPagination
 
 
 class CategoryViewSet(CategoryAndGenreViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    response_cache_models = (Category,)
 
 
 class GenreViewSet(CategoryAndGenreViewSet):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    response_cache_models = (Genre,)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = (
-        Title.objects
-        .annotate(rating=Avg('reviews__score'))
-        .order_by('name')
-    )
+class TitleViewSet(ConditionalGetMixin, ResponseCacheMixin, QueryPlanMixin,
+                   viewsets.ModelViewSet):
+    queryset = Title.objects.order_by('name')
     serializer_class = TitleReadOnlySerializer
-    filter_backends = (DjangoFilterBackend, filters.OrderingFilter,)
+    query_plan_serializer_class = TitleReadOnlySerializer
+    # Рейтинг и число отзывов меняются UPDATE без сигналов Title.
+    count_cache_models = (Title, Genre, Category, Review)
+    response_cache_models = (Title, Genre, Category, Review)
+    conditional_lookups = {'pk': 'pk'}
+    filter_backends = (
+        DjangoFilterBackend,
+        NullsLastOrderingFilter,
+        TitleSearchFilter,
+    )
     filterset_class = TitleFilter
     permission_classes = (IsAdminOrReadOnly,)
     http_method_names = ('get', 'post', 'patch', 'delete')
     ordering = ('name', 'year')
-    ordering_fields = ('name', 'year')
+    ordering_fields = ('name', 'year', 'rating', 'reviews_count')
+    nulls_last_fields = ('rating',)
+    export_chunk_size = 1000
+    search_truncated = None
 
     def get_serializer_class(self):
         if self.action in ('create', 'partial_update'):
             return TitleSerializerForWrite
         return TitleReadOnlySerializer
 
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.search_truncated is not None:
+            response.data['search_truncated'] = self.search_truncated
+        return response
+
+    @action(
+        detail=False,
+        url_path='export',
+        permission_classes=(IsAdminUserOrSuperuser,)
+    )
+    def export(self, request):
+        """Весь каталог в формате JSON Lines, по строке на произведение."""
+        return StreamingHttpResponse(
+            self.iter_export_lines(),
+            content_type='application/x-ndjson; charset=utf-8'
+        )
+
+    def iter_export_lines(self):
+        # Порции выбираются по ключу, а не OFFSET: каждая обходится в два
+        # запроса независимо от того, насколько далеко продвинулась выгрузка.
+        last_pk = 0
+        while True:
+            chunk = list(
+                Title.objects
+                .filter(pk__gt=last_pk)
+                .order_by('pk')
+                .values(
+                    'id', 'name', 'year', 'description', 'rating',
+                    'category__slug'
+                )[:self.export_chunk_size]
+            )
+            if not chunk:
+                return
+            genres = {}
+            for title_id, slug in (
+                Title.genre.through.objects
+                .filter(title_id__in=[title['id'] for title in chunk])
+                .order_by('genre__slug')
+                .values_list('title_id', 'genre__slug')
+            ):
+                genres.setdefault(title_id, []).append(slug)
+            for title in chunk:
+                title['category'] = title.pop('category__slug')
+                title['genre'] = genres.get(title['id'], [])
+                yield json.dumps(title, ensure_ascii=False) + '\n'
+            last_pk = chunk[-1]['id']
+
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
-    pagination_class = LimitOffsetPagination
+    pagination_class = FeedPagination
+    throttle_classes = (WriteThrottle,)
+    throttle_scope = 'reviews'
     permission_classes = (
         permissions.IsAuthenticatedOrReadOnly,
         IsAdminOrModeratorOrReadOnly,
@@ -88,15 +167,27 @@ class ReviewViewSet(viewsets.ModelViewSet):
         return get_object_or_404(Title, pk=self.kwargs['title_id'])
 
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        # Подзапрос вместо JOIN с GROUP BY: лента по-прежнему читается
+        # по индексу (title, pub_date, id) без сортировки во временном дереве.
+        comments_count = Comment.objects.filter(
+            review=OuterRef('pk')
+        ).order_by().values('review').annotate(
+            count=Count('pk')
+        ).values('count')
+        return self.get_title().reviews.annotate(
+            comments_count=Coalesce(Subquery(comments_count), 0)
+        )
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user, title=self.get_title())
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = CommentSerializer
-    pagination_class = LimitOffsetPagination
+    conditional_lookups = {'pk': 'title_id', 'reviews': 'review_id'}
+    pagination_class = FeedPagination
+    throttle_classes = (WriteThrottle,)
+    throttle_scope = 'comments'
     permission_classes = (
         permissions.IsAuthenticatedOrReadOnly,
         IsAdminOrModeratorOrReadOnly,
@@ -117,8 +208,29 @@ class CommentViewSet(viewsets.ModelViewSet):
         serializer.save(author=self.request.user, review=self.get_review())
 
 
+@api_view(("GET",))
+@permission_classes((permissions.AllowAny,))
+def autocomplete_view(request):
+    """Подсказки по началу названия произведения, жанра или категории."""
+    try:
+        limit = min(
+            int(request.query_params.get("limit", AUTOCOMPLETE_LIMIT)),
+            AUTOCOMPLETE_MAX_LIMIT,
+        )
+    except ValueError:
+        limit = AUTOCOMPLETE_LIMIT
+    kinds = request.query_params.get("type")
+    results = autocomplete_index.search(
+        request.query_params.get("q", ""),
+        limit=max(limit, 1),
+        kinds=set(kinds.split(",")) if kinds else None,
+    )
+    return Response(results, status=status.HTTP_200_OK)
+
+
 @api_view(("POST",))
 @permission_classes((permissions.AllowAny,))
+@throttle_classes((SignUpThrottle,))
 def sign_up_view(request):
     serializer = SignUpSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
@@ -142,28 +254,39 @@ class UserViewSet(viewsets.ModelViewSet):
             return UserSerializer
         return UserNoAdminSerializer
 
+    def get_current_user(self, for_update=False):
+        # request.user собран из снимка или claims токена и сохранять его
+        # нельзя: роль в claims могла устареть, а остальные поля отложены.
+        # Профиль читается из БД одним запросом.
+        queryset = User.objects.select_for_update() if for_update else (
+            User.objects.all()
+        )
+        return get_object_or_404(queryset, pk=self.request.user.pk)
+
     @action(
         detail=False,
         url_path="me",
         permission_classes=(IsAuthenticated,)
     )
     def me(self, request):
-        user = request.user
-        serializer = self.get_serializer(user)
+        serializer = self.get_serializer(self.get_current_user())
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     @me.mapping.patch
     def patch_me(self, request):
-        user = request.user
-        serializer = UserNoAdminSerializer(
-            user, data=request.data, partial=True)
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
+        # Блокировка не даёт записать поверх одновременной смены роли.
+        with transaction.atomic():
+            user = self.get_current_user(for_update=True)
+            serializer = UserNoAdminSerializer(
+                user, data=request.data, partial=True)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
 @api_view(("POST",))
 @permission_classes((permissions.AllowAny,))
+@throttle_classes((TokenObtainThrottle,))
 def get_token_obtain_pair_view(request):
     serializer = UserTokenSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
@@ -101,17 +101,40 @@ STATICFILES_DIRS = ((BASE_DIR / "static/"),)
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.authentication.CachedJWTAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_PAGINATION_CLASS": "api.pagination.CachedCountPagination",
     "PAGE_SIZE": 10,
+    "DEFAULT_THROTTLE_RATES": {
+        "signup": "10/hour",
+        "token": "20/hour",
+        "reviews": "20/min",
+        "comments": "60/min",
+    },
+    "THROTTLE_BACKEND": "api.throttling.LocalBucketBackend",
 
     "DEFAULT_FILTER_BACKENDS": ['django_filters.rest_framework.DjangoFilterBackend']
 }
 
+PAGINATION_COUNT_CACHE = {
+    "TIMEOUT": 300,
+    "ESTIMATE_THRESHOLD": 100000,
+}
+
+RESPONSE_CACHE = {
+    "BACKEND": "api.cache.LRUCacheBackend",
+    "OPTIONS": {"MAX_ENTRIES": 1024},
+    "TIMEOUT": 60,
+}
+
+AUTH_USER_CACHE = {
+    "TIMEOUT": 60,
+    "STATELESS": False,
+}
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=5),
     "AUTH_HEADER_TYPES": ("Bearer",),
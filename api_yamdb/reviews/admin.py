@@ -1,8 +1,10 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 
+from reviews.constants import SEARCH_MAX_RESULTS
 from reviews.models import (
     Category, Genre, Title,
     Review, Comment)
+from reviews.search import get_search_backend
 
 
 @admin.register(Category)
@@ -21,9 +23,8 @@ class GenreAdmin(admin.ModelAdmin):
 
 @admin.register(Title)
 class TitleAdmin(admin.ModelAdmin):
-    list_display = ('name', 'year', 'category', 'get_genres')
+    list_display = ('name', 'year', 'category', 'get_genres', 'rating')
     list_filter = ('year', 'genre', 'category')
-    search_fields = ('name', 'description')
     filter_horizontal = ('genre',)
     empty_value_display = 'Не задано'
 
@@ -31,6 +32,28 @@ class TitleAdmin(admin.ModelAdmin):
     def get_genres(self, obj):
         return ', '.join(genre for genre in obj.genre.all())
 
+    def get_search_fields(self, request):
+        # Ищет get_search_results по индексу reviews.search, а не по этим
+        # полям; без непустого списка админка не покажет строку поиска.
+        return ('name',)
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        title_ids = get_search_backend(queryset.db).search(
+            search_term, limit=SEARCH_MAX_RESULTS + 1
+        )
+        if len(title_ids) > SEARCH_MAX_RESULTS:
+            self.message_user(
+                request,
+                f'Показаны {SEARCH_MAX_RESULTS} самых релевантных '
+                'произведений, уточните запрос.',
+                messages.WARNING
+            )
+        return queryset.filter(
+            pk__in=title_ids[:SEARCH_MAX_RESULTS]
+        ), False
+
 
 @admin.register(Review)
 class ReviewAdmin(admin.ModelAdmin):
@@ -0,0 +1,118 @@
+from django.db import transaction
+from django.db.models import (
+    Case, Count, F, FloatField, IntegerField, OuterRef, Q, Subquery, Sum,
+    When
+)
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
+
+from reviews.models import Review, Title
+
+
+class RatingService:
+    """Поддержка хранимых агрегатов рейтинга произведения."""
+
+    @staticmethod
+    def apply_delta(title_id, score_delta, count_delta):
+        """Сдвигает сумму оценок и число отзывов одним UPDATE.
+
+        Заодно увеличивает версию произведения, как ``TitleVersionService``.
+        """
+        new_sum = F('score_sum') + score_delta
+        new_count = F('reviews_count') + count_delta
+        Title.objects.filter(pk=title_id).update(
+            **TitleVersionService.get_touch_values(),
+            score_sum=new_sum,
+            reviews_count=new_count,
+            rating=Case(
+                When(
+                    reviews_count__gt=-count_delta,
+                    then=Cast(new_sum, FloatField()) / new_count
+                ),
+                default=None,
+                output_field=FloatField()
+            )
+        )
+
+    @staticmethod
+    def recalculate(queryset=None):
+        """Пересчитывает агрегаты по таблице отзывов.
+
+        Возвращает количество обновлённых произведений.
+        """
+        if queryset is None:
+            queryset = Title.objects.all()
+        reviews = (
+            Review.objects
+            .filter(title=OuterRef('pk'))
+            .order_by()
+            .values('title')
+        )
+        score_sum = Coalesce(
+            Subquery(
+                reviews.annotate(total=Sum('score')).values('total'),
+                output_field=IntegerField()
+            ),
+            0
+        )
+        reviews_count = Coalesce(
+            Subquery(
+                reviews.annotate(total=Count('pk')).values('total'),
+                output_field=IntegerField()
+            ),
+            0
+        )
+        with transaction.atomic():
+            updated = queryset.update(
+                score_sum=score_sum, reviews_count=reviews_count
+            )
+            # Рейтинг считается отдельным UPDATE: в одном запросе F()
+            # ссылался бы на старые значения суммы и количества.
+            queryset.update(rating=Case(
+                When(
+                    reviews_count__gt=0,
+                    then=Cast(F('score_sum'), FloatField())
+                    / F('reviews_count')
+                ),
+                default=None,
+                output_field=FloatField()
+            ))
+        return updated
+
+
+class TitleVersionService:
+    """Версия произведения для условных GET-запросов.
+
+    Версия растёт при любом изменении отзывов и комментариев произведения,
+    их авторов, а также его жанров и категории, поэтому клиент может проверить
+    актуальность ленты одним запросом по первичному ключу.
+    """
+
+    @staticmethod
+    def get_touch_values():
+        return {'version': F('version') + 1, 'modified_at': timezone.now()}
+
+    @staticmethod
+    def touch(title_id):
+        Title.objects.filter(pk=title_id).update(
+            **TitleVersionService.get_touch_values()
+        )
+
+    @staticmethod
+    def touch_many(title_ids):
+        Title.objects.filter(pk__in=title_ids).update(
+            **TitleVersionService.get_touch_values()
+        )
+
+    @staticmethod
+    def touch_by_author(user_id):
+        """Произведения с отзывами или комментариями пользователя."""
+        Title.objects.filter(
+            Q(reviews__author=user_id) | Q(reviews__comments__author=user_id)
+        ).update(**TitleVersionService.get_touch_values())
+
+    @staticmethod
+    def touch_by_review(review_id):
+        Title.objects.filter(reviews=review_id).update(
+            **TitleVersionService.get_touch_values()
+        )
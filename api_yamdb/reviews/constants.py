@@ -3,6 +3,9 @@ LENGTH_FOR_SLUG = 50
 CLIPPING_LENGTH = 20
 MIN_VALUE_FOR_SCORE = 1
 MAX_VALUE_FOR_SCORE = 10
+MAX_EXPANDED_ITEMS = 10
+SEARCH_MAX_RESULTS = 1000
+PUB_DATE_FORMAT = '%Y-%m-%dT%H:%M:%S.%fZ'
 
 MAX_EMAIL_STRING = 254
 MAX_CONFORMATION_CODE_STRING = 5
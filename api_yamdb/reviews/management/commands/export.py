@@ -0,0 +1,114 @@
+import os
+import csv
+import gzip
+import json
+import time
+from datetime import datetime, timezone
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from reviews.constants import PUB_DATE_FORMAT
+
+FILE_TO_MODEL = {
+    'users': ('users.User', (
+        'id', 'username', 'email', 'role', 'bio', 'first_name', 'last_name'
+    )),
+    'category': ('reviews.Category', ('id', 'name', 'slug')),
+    'genre': ('reviews.Genre', ('id', 'name', 'slug')),
+    'titles': ('reviews.Title', ('id', 'name', 'year', 'category')),
+    'genre_title': ('reviews.Title_genre', ('id', 'title_id', 'genre_id')),
+    'review': ('reviews.Review', (
+        'id', 'title_id', 'text', 'author', 'score', 'pub_date'
+    )),
+    'comments': ('reviews.Comment', (
+        'id', 'review_id', 'text', 'author', 'pub_date'
+    )),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает каталог в CSV или JSON Lines в формате файлов '
+        'import_from_csv, не загружая таблицы в память целиком.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'output_dir',
+            help='Папка, в которую будут записаны файлы.'
+        )
+        parser.add_argument(
+            '--format',
+            choices=('csv', 'jsonl'),
+            default='csv',
+            help='Формат файлов выгрузки.'
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Сжимать файлы gzip.'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Количество строк, читаемых из БД за один раз.'
+        )
+
+    def handle(self, *args, **options):
+        output_dir = options['output_dir']
+        os.makedirs(output_dir, exist_ok=True)
+        started = time.monotonic()
+
+        for name, (model_path, columns) in FILE_TO_MODEL.items():
+            file_name = f'{name}.{options["format"]}'
+            if options['gzip']:
+                file_name += '.gz'
+            file_path = os.path.join(output_dir, file_name)
+            file_started = time.monotonic()
+            rows = self.export_model(
+                apps.get_model(model_path), columns, file_path,
+                options['format'], options['gzip'], options['chunk_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'{file_name}: выгружено строк: {rows} за '
+                f'{time.monotonic() - file_started:.2f} с.'))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Выгрузка завершена за {time.monotonic() - started:.2f} с.'))
+
+    def export_model(self, model, columns, file_path, file_format,
+                     compress, chunk_size):
+        attnames = [model._meta.get_field(column).attname
+                    for column in columns]
+        values = (
+            model.objects.order_by('pk').values_list(*attnames)
+            .iterator(chunk_size=chunk_size)
+        )
+        opener = gzip.open if compress else open
+        rows = 0
+
+        with opener(file_path, 'wt', newline='', encoding='utf-8') as f:
+            if file_format == 'csv':
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                for row in values:
+                    writer.writerow(self.format_row(row))
+                    rows += 1
+            else:
+                for row in values:
+                    f.write(json.dumps(
+                        dict(zip(columns, self.format_row(row))),
+                        ensure_ascii=False
+                    ))
+                    f.write('\n')
+                    rows += 1
+        return rows
+
+    @staticmethod
+    def format_row(row):
+        return [
+            value.astimezone(timezone.utc).strftime(PUB_DATE_FORMAT)
+            if isinstance(value, datetime) else value
+            for value in row
+        ]
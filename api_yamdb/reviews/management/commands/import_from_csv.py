@@ -1,18 +1,164 @@
 import os
 import csv
-from datetime import datetime
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from itertools import zip_longest
 
 from django.apps import apps
 from django.core.management.base import BaseCommand
+from django.db import (
+    DatabaseError, connection, connections, models, transaction
+)
 
-from reviews.models import Title, Genre
+from api.autocomplete import autocomplete_index
+from api.cache import bump_generation
+from reviews.common import RatingService
+from reviews.constants import PUB_DATE_FORMAT
+from reviews.search import get_search_backend
+
+CHECKPOINT_FILE = 'import_checkpoint.json'
+QUARANTINE_SUFFIX = '.rejected.csv'
+
+
+class RejectedRow(Exception):
+    """Строка CSV не может быть загружена."""
+
+
+class Checkpoint:
+    """Позиция последнего сохранённого пакета каждого файла.
+
+    Пакеты могут завершаться не по порядку, поэтому в файл контрольной
+    точки записывается только непрерывно сохранённый префикс файла.
+    """
+
+    def __init__(self, path, resume):
+        self.path = path
+        self.lock = threading.Lock()
+        self.positions = {}
+        self.pending = {}
+        if resume and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.positions = json.load(f)
+
+    def get(self, file):
+        return self.positions.get(file)
+
+    def start_file(self, file):
+        self.pending[file] = {'next': 0, 'done': {}}
+
+    def mark(self, file, sequence, offset, row):
+        with self.lock:
+            pending = self.pending[file]
+            pending['done'][sequence] = (offset, row)
+            advanced = False
+            while pending['next'] in pending['done']:
+                offset, row = pending['done'].pop(pending['next'])
+                pending['next'] += 1
+                self.positions[file] = {'offset': offset, 'row': row}
+                advanced = True
+            if advanced:
+                self.save()
+
+    def finish_file(self, file):
+        with self.lock:
+            self.positions.setdefault(file, {})['done'] = True
+            self.save()
+
+    def save(self):
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.positions, f)
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class Quarantine:
+    """CSV-файлы с отклонёнными строками и причинами отказа."""
+
+    def __init__(self, directory, append):
+        self.directory = directory
+        self.mode = 'a' if append else 'w'
+        self.lock = threading.Lock()
+        self.files = {}
+
+    def reject(self, file, columns, row, reason):
+        with self.lock:
+            if file not in self.files:
+                path = os.path.join(self.directory, file + QUARANTINE_SUFFIX)
+                write_header = (
+                    self.mode == 'w' or not os.path.exists(path)
+                )
+                handle = open(path, self.mode, newline='', encoding='utf-8')
+                writer = csv.DictWriter(
+                    handle, (*columns, 'reason'), extrasaction='ignore')
+                if write_header:
+                    writer.writeheader()
+                self.files[file] = (handle, writer)
+            handle, writer = self.files[file]
+            writer.writerow({**row, 'reason': reason})
+            handle.flush()
+
+    def close(self):
+        for handle, _ in self.files.values():
+            handle.close()
 
 
 class Command(BaseCommand):
+    help = 'Загружает данные из CSV-файлов потоково, пакетами.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Количество строк в одном bulk_create и транзакции.'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help=(
+                'Количество потоков загрузки. Файлы одного этапа и пакеты '
+                'строк одного файла загружаются параллельно, каждый поток '
+                'работает через своё соединение с БД.'
+            )
+        )
+        parser.add_argument(
+            '--data-dir',
+            help='Папка с CSV-файлами. По умолчанию — data рядом с командой.'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help=(
+                'Файл контрольной точки. По умолчанию '
+                f'{CHECKPOINT_FILE} в текущей папке.'
+            )
+        )
+        parser.add_argument(
+            '--quarantine-dir',
+            help=(
+                'Папка для отклонённых строк (<файл>'
+                f'{QUARANTINE_SUFFIX}). По умолчанию — текущая папка.'
+            )
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Продолжить загрузку с последней контрольной точки.'
+        )
 
     def handle(self, *args, **kwargs):
+        self.batch_size = kwargs['batch_size']
+        self.workers = kwargs['workers']
+        self.stats_lock = threading.Lock()
         base_dir = os.path.dirname(os.path.abspath(__file__))
-        data_dir = os.path.join(base_dir, 'data')
+        data_dir = kwargs['data_dir'] or os.path.join(base_dir, 'data')
 
         if not os.path.exists(data_dir):
             self.stdout.write(self.style.ERROR(
@@ -24,71 +170,365 @@ class Command(BaseCommand):
             'category.csv': 'reviews.Category',
             'genre.csv': 'reviews.Genre',
             'titles.csv': 'reviews.Title',
+            'genre_title.csv': 'reviews.Title_genre',
             'review.csv': 'reviews.Review',
             'comments.csv': 'reviews.Comment',
         }
 
-        for file, model_path in file_to_model.items():
+        # Служебные файлы по умолчанию пишутся в текущую папку, а не рядом
+        # с данными: папка data по умолчанию лежит в исходном коде.
+        self.checkpoint = Checkpoint(
+            kwargs['checkpoint'] or os.path.join(os.getcwd(), CHECKPOINT_FILE),
+            kwargs['resume']
+        )
+        self.quarantine = Quarantine(
+            kwargs['quarantine_dir'] or os.getcwd(), kwargs['resume']
+        )
+
+        if self.workers > 1 and connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING(
+                'SQLite не поддерживает параллельную запись, '
+                'загрузка выполняется в один поток.'))
+            self.workers = 1
+        executor = None
+        if self.workers > 1:
+            executor = ThreadPoolExecutor(max_workers=self.workers)
+
+        started = time.monotonic()
+        try:
+            stages = self.get_stages(file_to_model)
+            for number, stage in enumerate(stages, 1):
+                stage_started = time.monotonic()
+                self.stdout.write(self.style.SUCCESS(
+                    f'Этап {number}: {", ".join(stage)}'))
+                self.load_stage(executor, data_dir, stage, file_to_model)
+                self.stdout.write(
+                    f'Этап {number} завершён за '
+                    f'{time.monotonic() - stage_started:.2f} с.')
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            self.quarantine.close()
+
+        # bulk_create не вызывает сигналы, поэтому рейтинги, поисковый
+        # индекс произведений и поколения кэшей обновляются после загрузки.
+        RatingService.recalculate()
+        get_search_backend().rebuild()
+        for label in file_to_model.values():
+            bump_generation(apps.get_model(label))
+        for model in autocomplete_index.models:
+            bump_generation(model, scope=autocomplete_index.GENERATION_SCOPE)
+        self.checkpoint.remove()
+
+        self.stdout.write(self.style.SUCCESS(
+            'Загрузка данных завершена успешно за '
+            f'{time.monotonic() - started:.2f} с.'))
+
+    @staticmethod
+    def get_stages(file_to_model):
+        """Разбивает файлы на этапы по графу внешних ключей моделей.
+
+        Файлы одного этапа не ссылаются друг на друга, а все модели,
+        на которые они ссылаются, загружены на предыдущих этапах.
+        """
+        file_by_model = {
+            apps.get_model(model_path): file
+            for file, model_path in file_to_model.items()
+        }
+        dependencies = {
+            file: {
+                file_by_model[field.related_model]
+                for field in model._meta.concrete_fields
+                if field.many_to_one
+                and field.related_model in file_by_model
+                and field.related_model is not model
+            }
+            for model, file in file_by_model.items()
+        }
+        stages = []
+        loaded = set()
+        while dependencies:
+            stage = [
+                file for file, parents in dependencies.items()
+                if parents <= loaded
+            ]
+            if not stage:
+                raise ValueError(
+                    'Циклическая зависимость между файлами: '
+                    f'{", ".join(dependencies)}')
+            for file in stage:
+                del dependencies[file]
+            loaded.update(stage)
+            stages.append(stage)
+        return stages
+
+    def load_stage(self, executor, data_dir, stage, file_to_model):
+        """Загружает файлы этапа и ждёт записи всех их пакетов.
+
+        С пулом потоков каждый файл этапа читается в отдельном потоке.
+        """
+        files = []
+        for file in stage:
             file_path = os.path.join(data_dir, file)
             if not os.path.exists(file_path):
                 self.stdout.write(self.style.WARNING(
                     f'Файл {file} не найден, продолжаем'))
                 continue
+            if (self.checkpoint.get(file) or {}).get('done'):
+                self.stdout.write(
+                    f'Файл {file} уже загружен, пропускаем')
+                continue
 
-            model = apps.get_model(model_path)
             self.stdout.write(self.style.SUCCESS(
                 f'Загрузка данных из файла {file}...'))
+            files.append((apps.get_model(file_to_model[file]), file_path))
 
-            with open(file_path, newline='', encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile)
-                objects = []
+        if executor is None or len(files) < 2:
+            loads = [
+                self.load_file(executor, model, file_path)
+                for model, file_path in files
+            ]
+        else:
+            with ThreadPoolExecutor(max_workers=len(files)) as readers:
+                loads = list(readers.map(
+                    lambda args: self.load_file_in_thread(executor, *args),
+                    files))
 
-                for row in reader:
-                    if model.objects.filter(id=row['id']).exists():
-                        continue
+        for stats, futures in loads:
+            for future in futures:
+                future.result()
+            self.checkpoint.finish_file(stats['file'])
+            self.report_file(stats)
 
-                    object_data = self.prepare_object_data(model, row)
-                    objects.append(model(**object_data))
+    def load_file(self, executor, model, file_path):
+        """Читает файл построчно и записывает его пакетами.
 
-            model.objects.bulk_create(objects)
-            self.stdout.write(self.style.SUCCESS(
-                f'Данные из {file} успешно загружены.'))
+        Существующие id загружаются одним запросом, внешние ключи
+        присваиваются через ``*_id`` без обращения к связанным таблицам.
+        При возобновлении чтение начинается с позиции контрольной точки.
+        При наличии пула пакеты пишутся параллельно; возвращаются
+        статистика файла и futures отправленных пакетов.
+        """
+        file = os.path.basename(file_path)
+        stats = {
+            'file': file,
+            'started': time.monotonic(),
+            'finished': None,
+            'loaded': 0,
+            'skipped': 0,
+            'rejected': 0,
+        }
+        # Ограничивает число прочитанных, но ещё не записанных пакетов,
+        # чтобы чтение файла не опережало запись в БД.
+        in_flight = threading.BoundedSemaphore(self.workers * 2)
+        futures = []
 
-        genre_title_file = os.path.join(data_dir, 'genre_title.csv')
-        if os.path.exists(genre_title_file):
-            self.load_genres(genre_title_file)
-        else:
-            self.stdout.write(self.style.WARNING(
-                'Файл genre_title.csv не найден, пропускаем'))
+        with open(file_path, newline='', encoding='utf-8') as csvfile:
+            columns = next(csv.reader([csvfile.readline()]))
+            loader = {
+                'model': model,
+                'file': file,
+                'columns': columns,
+                'converters': self.get_converters(model, columns),
+                'existing_ids': self.get_existing_ids(model),
+                'parent_ids': self.get_parent_ids(model, columns),
+            }
+            row_number = 0
+            position = self.checkpoint.get(file)
+            if position:
+                csvfile.seek(position['offset'])
+                row_number = position['row']
+                self.stdout.write(
+                    f'  {file}: продолжение со строки {row_number + 1}')
+            self.checkpoint.start_file(file)
 
-        self.stdout.write(self.style.SUCCESS(
-            'Загрузка данных завершена успешно.'))
+            chunk = []
+            sequence = 0
+            for row in self.read_rows(csvfile, columns):
+                chunk.append(row)
+                row_number += 1
+                if len(chunk) < self.batch_size:
+                    continue
+                end = (sequence, csvfile.tell(), row_number)
+                if executor is None:
+                    self.load_chunk(loader, chunk, end, stats)
+                else:
+                    in_flight.acquire()
+                    future = executor.submit(
+                        self.load_chunk_in_thread, loader, chunk, end, stats)
+                    future.add_done_callback(lambda _: in_flight.release())
+                    futures.append(future)
+                chunk = []
+                sequence += 1
 
-    def prepare_object_data(self, model, row):
-        object_data = {}
+            if chunk:
+                self.load_chunk(
+                    loader, chunk, (sequence, csvfile.tell(), row_number),
+                    stats)
 
-        for field, value in row.items():
-            if field in ('category', 'author'):
-                object_data[field] = model._meta.get_field(
-                    field).related_model.objects.get(id=value)
-            elif field == 'pub_date':
-                object_data[field] = datetime.strptime(
-                    value, '%Y-%m-%dT%H:%M:%S.%fZ')
+        return stats, futures
+
+    @staticmethod
+    def read_rows(csvfile, columns):
+        """Читает строки через readline, чтобы ``tell()`` оставался точным."""
+        def lines():
+            line = csvfile.readline()
+            while line:
+                yield line
+                line = csvfile.readline()
+
+        for values in csv.reader(lines()):
+            yield dict(zip_longest(columns, values))
+
+    def load_file_in_thread(self, *args):
+        try:
+            return self.load_file(*args)
+        finally:
+            # Соединения с БД открываются отдельно в каждом потоке.
+            connections.close_all()
+
+    def load_chunk_in_thread(self, *args):
+        try:
+            self.load_chunk(*args)
+        finally:
+            connections.close_all()
+
+    def load_chunk(self, loader, chunk, end, stats):
+        batch = []
+        skipped = 0
+        for row in chunk:
+            try:
+                obj = self.build_object(loader, row)
+            except RejectedRow as error:
+                self.reject(loader, row, str(error), stats)
+                continue
+            if obj is None:
+                skipped += 1
             else:
-                object_data[field] = value
+                batch.append((row, obj))
+
+        loaded = self.flush(loader, batch, stats) if batch else 0
+        sequence, offset, row_number = end
+        self.checkpoint.mark(loader['file'], sequence, offset, row_number)
+        with self.stats_lock:
+            stats['loaded'] += loaded
+            stats['skipped'] += skipped
+            stats['finished'] = time.monotonic()
+            self.report_progress(stats)
+
+    def build_object(self, loader, row):
+        """Создаёт объект модели или ``None`` для уже загруженной строки."""
+        if None in row or None in row.values():
+            raise RejectedRow('неверное количество колонок')
+        try:
+            object_data = self.prepare_object_data(loader['converters'], row)
+        except ValueError as error:
+            raise RejectedRow(f'ошибка формата: {error}')
+        try:
+            pk = int(object_data.get('id', ''))
+        except ValueError:
+            raise RejectedRow(f'некорректный id: {row.get("id")!r}')
+        if pk in loader['existing_ids']:
+            return None
+        for column, (parent_ids, nullable) in loader['parent_ids'].items():
+            value = row[column]
+            if not value and nullable:
+                continue
+            if not value.isdigit() or int(value) not in parent_ids:
+                raise RejectedRow(
+                    f'{column}: связанный объект {value!r} не найден')
+        return loader['model'](**object_data)
+
+    def reject(self, loader, row, reason, stats):
+        self.quarantine.reject(loader['file'], loader['columns'], row, reason)
+        with self.stats_lock:
+            stats['rejected'] += 1
+
+    def get_parent_ids(self, model, columns):
+        """Id связанных объектов для проверки внешних ключей строк."""
+        parent_ids = {}
+        for column in columns:
+            field = model._meta.get_field(column)
+            if field.many_to_one:
+                parent_ids[column] = (
+                    self.get_existing_ids(field.related_model), field.null
+                )
+        return parent_ids
+
+    @staticmethod
+    def get_existing_ids(model):
+        return set(
+            model.objects.order_by().values_list('pk', flat=True).iterator()
+        )
+
+    def get_converters(self, model, columns):
+        """Сопоставляет колонкам CSV атрибуты модели и преобразователи."""
+        converters = {}
+        for column in columns:
+            field = model._meta.get_field(column)
+            if isinstance(field, models.DateTimeField):
+                converter = self.parse_pub_date
+            elif field.many_to_one and field.null:
+                converter = self.parse_nullable_id
+            else:
+                converter = None
+            converters[column] = (field.attname, converter)
+        return converters
+
+    @staticmethod
+    def parse_pub_date(value):
+        return datetime.strptime(value, PUB_DATE_FORMAT).replace(
+            tzinfo=timezone.utc)
+
+    @staticmethod
+    def parse_nullable_id(value):
+        return value or None
+
+    def prepare_object_data(self, converters, row):
+        object_data = {}
+
+        for column, value in row.items():
+            attname, converter = converters[column]
+            object_data[attname] = converter(value) if converter else value
 
         return object_data
 
-    def load_genres(self, file_path):
-        self.stdout.write(self.style.SUCCESS(
-            'Обработка файла genre_title.csv...'))
+    def flush(self, loader, batch, stats):
+        """Сохраняет пакет; при ошибке БД ищет виновные строки по одной."""
+        model = loader['model']
+        try:
+            with transaction.atomic():
+                model.objects.bulk_create(
+                    [obj for _, obj in batch],
+                    batch_size=self.batch_size, ignore_conflicts=True)
+            return len(batch)
+        except DatabaseError:
+            pass
 
-        with open(file_path, newline='', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
+        loaded = 0
+        for row, obj in batch:
+            try:
+                with transaction.atomic():
+                    model.objects.bulk_create([obj], ignore_conflicts=True)
+                loaded += 1
+            except DatabaseError as error:
+                self.reject(loader, row, f'ошибка БД: {error}', stats)
+        return loaded
 
-            for row in reader:
-                title = Title.objects.get(id=row['title_id'])
-                genre = Genre.objects.get(id=row['genre_id'])
-                title.genre.add(genre)
+    def report_progress(self, stats):
+        elapsed = (stats['finished'] or time.monotonic()) - stats['started']
+        rate = stats['loaded'] / elapsed if elapsed else stats['loaded']
+        self.stdout.write(
+            f'  {stats["file"]}: загружено строк: {stats["loaded"]} '
+            f'({rate:.0f} строк/с)')
 
-        self.stdout.write(self.style.SUCCESS('Жанры успешно добавлены.'))
+    def report_file(self, stats):
+        elapsed = (stats['finished'] or time.monotonic()) - stats['started']
+        self.stdout.write(self.style.SUCCESS(
+            f'Данные из {stats["file"]} успешно загружены: '
+            f'{stats["loaded"]} строк, пропущено {stats["skipped"]}, '
+            f'{elapsed:.2f} с.'))
+        if stats['rejected']:
+            self.stdout.write(self.style.WARNING(
+                f'  {stats["file"]}: отклонено строк: {stats["rejected"]}, '
+                f'см. {stats["file"]}{QUARANTINE_SUFFIX}'))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+
+from api.cache import bump_generation
+from reviews.common import RatingService
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает хранимые рейтинги произведений по отзывам.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Количество произведений, пересчитываемых за один UPDATE.'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        max_id = Title.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+        updated = 0
+        for start in range(0, max_id, batch_size):
+            updated += RatingService.recalculate(
+                Title.objects.filter(id__gt=start, id__lte=start + batch_size)
+            )
+        # UPDATE не вызывает сигналы: кэши списков сбрасываются явно.
+        bump_generation(Title)
+        self.stdout.write(self.style.SUCCESS(
+            f'Рейтинги пересчитаны для {updated} произведений.'))
@@ -0,0 +1,61 @@
+from django.db import migrations
+
+# SQL зафиксирован здесь, а не берётся из reviews.search: миграция должна
+# работать с таблицами в том виде, в каком они были на этом шаге.
+CREATE_SQL = {
+    'sqlite': (
+        'CREATE VIRTUAL TABLE reviews_title_search USING fts5('
+        'name, description, genres, category, '
+        'tokenize="unicode61 remove_diacritics 2")',
+        'INSERT INTO reviews_title_search '
+        '(rowid, name, description, genres, category) '
+        'SELECT t.id, t.name, t.description, '
+        'COALESCE((SELECT group_concat(g.name, \' \') FROM reviews_genre g '
+        'JOIN reviews_title_genre tg ON tg.genre_id = g.id '
+        'WHERE tg.title_id = t.id), \'\'), '
+        'COALESCE(c.name, \'\') '
+        'FROM reviews_title t '
+        'LEFT JOIN reviews_category c ON c.id = t.category_id',
+    ),
+    'postgresql': (
+        'CREATE TABLE reviews_title_search ('
+        'title_id bigint PRIMARY KEY '
+        'REFERENCES reviews_title (id) ON DELETE CASCADE, '
+        'document tsvector NOT NULL)',
+        'CREATE INDEX reviews_title_search_document_idx '
+        'ON reviews_title_search USING GIN (document)',
+        'INSERT INTO reviews_title_search (title_id, document) '
+        'SELECT t.id, '
+        'setweight(to_tsvector(\'simple\', t.name), \'A\') || '
+        'setweight(to_tsvector(\'simple\', COALESCE(('
+        'SELECT string_agg(g.name, \' \') FROM reviews_genre g '
+        'JOIN reviews_title_genre tg ON tg.genre_id = g.id '
+        'WHERE tg.title_id = t.id), \'\')), \'B\') || '
+        'setweight(to_tsvector(\'simple\', COALESCE(c.name, \'\')), \'B\') || '
+        'setweight(to_tsvector(\'simple\', t.description), \'C\') '
+        'FROM reviews_title t '
+        'LEFT JOIN reviews_category c ON c.id = t.category_id',
+    ),
+}
+DROP_SQL = 'DROP TABLE IF EXISTS reviews_title_search'
+
+
+def create_search_index(apps, schema_editor):
+    for sql in CREATE_SQL.get(schema_editor.connection.vendor, ()):
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in CREATE_SQL:
+        schema_editor.execute(DROP_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_title_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
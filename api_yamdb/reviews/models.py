@@ -2,7 +2,7 @@ from datetime import datetime
 
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db import models
+from django.db import models, transaction
 
 from .constants import (
     LENGTH_FOR_NAME,
@@ -101,8 +101,53 @@ class Title(models.Model):
         related_name='titles',
         verbose_name='Категория'
     )
+    score_sum = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Сумма оценок'
+    )
+    reviews_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество отзывов'
+    )
+    rating = models.FloatField(
+        null=True,
+        editable=False,
+        verbose_name='Рейтинг'
+    )
+    version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Версия отзывов и комментариев'
+    )
+    modified_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата и время изменения'
+    )
 
     class Meta:
+        # Индексы повторяют сортировку списка произведений ('name', 'year')
+        # с фильтрами по году и категории, чтобы обойтись без сортировки.
+        indexes = (
+            models.Index(
+                fields=('name', 'year'),
+                name='title_name_year_idx'
+            ),
+            models.Index(
+                fields=('category', 'name', 'year'),
+                name='title_category_name_idx'
+            ),
+            models.Index(
+                fields=('year', 'name'),
+                name='title_year_name_idx'
+            ),
+            models.Index(fields=('rating',), name='title_rating_idx'),
+            models.Index(
+                fields=('reviews_count',),
+                name='title_reviews_count_idx'
+            ),
+        )
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
 
@@ -133,9 +178,53 @@ class Review(TextAndAuthorAndPubDateAbstractModel):
 
     class Meta(TextAndAuthorAndPubDateAbstractModel.Meta):
         unique_together = ('author', 'title')
+        indexes = (
+            models.Index(
+                fields=('title', 'pub_date', 'id'),
+                name='review_title_pub_date_idx'
+            ),
+        )
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем оценку из БД, чтобы при изменении отзыва
+        # скорректировать агрегаты произведения на разницу оценок.
+        instance._loaded_score = instance.__dict__.get('score')
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Агрегаты рейтинга обновляются в post_save, поэтому запись отзыва
+        # и пересчёт произведения выполняются в одной транзакции.
+        with transaction.atomic(using=kwargs.get('using')):
+            if not self._state.adding and self.pk is not None:
+                # Оценка, прочитанная при загрузке, могла устареть из-за
+                # параллельной правки. Перечитываем её под блокировкой
+                # строки, чтобы разница оценок считалась от значения в БД.
+                self._loaded_score = (
+                    Review.objects.using(kwargs.get('using'))
+                    .select_for_update()
+                    .filter(pk=self.pk)
+                    .values_list('score', flat=True)
+                    .first()
+                )
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        # Как и в save, агрегаты уменьшаются на оценку из БД, прочитанную
+        # под блокировкой строки, а не на загруженную в экземпляр.
+        with transaction.atomic(using=kwargs.get('using')):
+            self._deleted_score = (
+                Review.objects.using(kwargs.get('using'))
+                .select_for_update()
+                .filter(pk=self.pk)
+                .values_list('score', flat=True)
+                .first()
+            )
+            return super().delete(*args, **kwargs)
+
 
 class Comment(TextAndAuthorAndPubDateAbstractModel):
     review = models.ForeignKey(
@@ -146,5 +235,11 @@ class Comment(TextAndAuthorAndPubDateAbstractModel):
     )
 
     class Meta(TextAndAuthorAndPubDateAbstractModel.Meta):
+        indexes = (
+            models.Index(
+                fields=('review', 'pub_date', 'id'),
+                name='comment_review_pub_date_idx'
+            ),
+        )
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
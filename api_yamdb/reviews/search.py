@@ -0,0 +1,248 @@
+import re
+from abc import ABC, abstractmethod
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Q
+
+from reviews.constants import SEARCH_MAX_RESULTS
+from reviews.models import Category, Genre, Title
+
+SEARCH_TABLE = 'reviews_title_search'
+IDS_CHUNK_SIZE = 500
+
+
+class TitleSearchBackend(ABC):
+    """Полнотекстовый индекс произведений.
+
+    В индекс попадают название, описание, жанры и категория произведения.
+    Индекс хранится в отдельной таблице, которую создаёт миграция,
+    и обновляется сигналами при изменении произведений, жанров и категорий.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    @staticmethod
+    def get_terms(query):
+        return re.findall(r'\w+', query)
+
+    def get_tables(self):
+        quote = self.connection.ops.quote_name
+        return {
+            'search': quote(SEARCH_TABLE),
+            'title': quote(Title._meta.db_table),
+            'genre': quote(Genre._meta.db_table),
+            'category': quote(Category._meta.db_table),
+            'title_genre': quote(Title.genre.through._meta.db_table),
+        }
+
+    def execute(self, sql, params=()):
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql.format(**self.get_tables()), params)
+            if cursor.description:
+                return cursor.fetchall()
+        return None
+
+    def chunks(self, title_ids):
+        title_ids = list(title_ids)
+        for start in range(0, len(title_ids), IDS_CHUNK_SIZE):
+            yield title_ids[start:start + IDS_CHUNK_SIZE]
+
+    @abstractmethod
+    def create_index(self):
+        pass
+
+    @abstractmethod
+    def drop_index(self):
+        pass
+
+    @abstractmethod
+    def index(self, title_ids):
+        pass
+
+    @abstractmethod
+    def remove(self, title_ids):
+        pass
+
+    @abstractmethod
+    def rebuild(self):
+        pass
+
+    @abstractmethod
+    def search(self, query, limit=SEARCH_MAX_RESULTS):
+        """Возвращает id найденных произведений, самые релевантные первыми."""
+
+
+class SQLiteSearchBackend(TitleSearchBackend):
+    """Индекс на виртуальной таблице FTS5; rowid совпадает с id."""
+
+    # Веса столбцов для bm25: название, описание, жанры, категория.
+    WEIGHTS = (10.0, 1.0, 4.0, 4.0)
+    DOCUMENT_SQL = (
+        'INSERT INTO {search} (rowid, name, description, genres, category) '
+        'SELECT t.id, t.name, t.description, '
+        'COALESCE((SELECT group_concat(g.name, \' \') FROM {genre} g '
+        'JOIN {title_genre} tg ON tg.genre_id = g.id '
+        'WHERE tg.title_id = t.id), \'\'), '
+        'COALESCE(c.name, \'\') '
+        'FROM {title} t LEFT JOIN {category} c ON c.id = t.category_id'
+    )
+
+    def create_index(self):
+        self.execute(
+            'CREATE VIRTUAL TABLE {search} USING fts5('
+            'name, description, genres, category, '
+            'tokenize="unicode61 remove_diacritics 2")'
+        )
+
+    def drop_index(self):
+        self.execute('DROP TABLE IF EXISTS {search}')
+
+    def index(self, title_ids):
+        for chunk in self.chunks(title_ids):
+            placeholders = ', '.join(['%s'] * len(chunk))
+            self.execute(
+                f'DELETE FROM {{search}} WHERE rowid IN ({placeholders})',
+                chunk
+            )
+            self.execute(
+                f'{self.DOCUMENT_SQL} WHERE t.id IN ({placeholders})', chunk
+            )
+
+    def remove(self, title_ids):
+        for chunk in self.chunks(title_ids):
+            placeholders = ', '.join(['%s'] * len(chunk))
+            self.execute(
+                f'DELETE FROM {{search}} WHERE rowid IN ({placeholders})',
+                chunk
+            )
+
+    def rebuild(self):
+        self.execute('DELETE FROM {search}')
+        self.execute(self.DOCUMENT_SQL)
+
+    def search(self, query, limit=SEARCH_MAX_RESULTS):
+        terms = self.get_terms(query)
+        if not terms:
+            return []
+        match = ' '.join(f'"{term}"*' for term in terms)
+        weights = ', '.join(map(str, self.WEIGHTS))
+        rows = self.execute(
+            'SELECT rowid FROM {search} WHERE {search} MATCH %s '
+            f'ORDER BY bm25({{search}}, {weights}), rowid LIMIT %s',
+            (match, limit)
+        )
+        return [title_id for title_id, in rows]
+
+
+class PostgreSQLSearchBackend(TitleSearchBackend):
+    """Индекс на столбце tsvector с GIN-индексом."""
+
+    DOCUMENT_SQL = (
+        'INSERT INTO {search} (title_id, document) '
+        'SELECT t.id, '
+        'setweight(to_tsvector(\'simple\', t.name), \'A\') || '
+        'setweight(to_tsvector(\'simple\', COALESCE(('
+        'SELECT string_agg(g.name, \' \') FROM {genre} g '
+        'JOIN {title_genre} tg ON tg.genre_id = g.id '
+        'WHERE tg.title_id = t.id), \'\')), \'B\') || '
+        'setweight(to_tsvector(\'simple\', COALESCE(c.name, \'\')), \'B\') || '
+        'setweight(to_tsvector(\'simple\', t.description), \'C\') '
+        'FROM {title} t LEFT JOIN {category} c ON c.id = t.category_id'
+    )
+    UPSERT_SQL = (
+        ' ON CONFLICT (title_id) DO UPDATE SET document = EXCLUDED.document'
+    )
+
+    def create_index(self):
+        self.execute(
+            'CREATE TABLE {search} ('
+            'title_id bigint PRIMARY KEY '
+            'REFERENCES {title} (id) ON DELETE CASCADE, '
+            'document tsvector NOT NULL)'
+        )
+        self.execute(
+            'CREATE INDEX reviews_title_search_document_idx '
+            'ON {search} USING GIN (document)'
+        )
+
+    def drop_index(self):
+        self.execute('DROP TABLE IF EXISTS {search}')
+
+    def index(self, title_ids):
+        for chunk in self.chunks(title_ids):
+            self.execute(
+                f'{self.DOCUMENT_SQL} WHERE t.id = ANY(%s){self.UPSERT_SQL}',
+                (chunk,)
+            )
+
+    def remove(self, title_ids):
+        for chunk in self.chunks(title_ids):
+            self.execute(
+                'DELETE FROM {search} WHERE title_id = ANY(%s)', (chunk,)
+            )
+
+    def rebuild(self):
+        self.execute('TRUNCATE {search}')
+        self.execute(self.DOCUMENT_SQL)
+
+    def search(self, query, limit=SEARCH_MAX_RESULTS):
+        terms = self.get_terms(query)
+        if not terms:
+            return []
+        rows = self.execute(
+            'SELECT title_id FROM {search}, to_tsquery(\'simple\', %s) query '
+            'WHERE document @@ query '
+            'ORDER BY ts_rank(document, query) DESC, title_id LIMIT %s',
+            (' & '.join(f'{term}:*' for term in terms), limit)
+        )
+        return [title_id for title_id, in rows]
+
+
+class LikeSearchBackend(TitleSearchBackend):
+    """Поиск без индекса для прочих СУБД: LIKE по тем же полям."""
+
+    def create_index(self):
+        pass
+
+    def drop_index(self):
+        pass
+
+    def index(self, title_ids):
+        pass
+
+    def remove(self, title_ids):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def search(self, query, limit=SEARCH_MAX_RESULTS):
+        terms = self.get_terms(query)
+        if not terms:
+            return []
+        queryset = Title.objects.using(self.connection.alias)
+        for term in terms:
+            queryset = queryset.filter(
+                Q(name__icontains=term)
+                | Q(description__icontains=term)
+                | Q(genre__name__icontains=term)
+                | Q(category__name__icontains=term)
+            )
+        return list(
+            queryset.order_by('pk').distinct()
+            .values_list('pk', flat=True)[:limit]
+        )
+
+
+SEARCH_BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgreSQLSearchBackend,
+}
+
+
+def get_search_backend(using=DEFAULT_DB_ALIAS):
+    connection = connections[using]
+    return SEARCH_BACKENDS.get(connection.vendor, LikeSearchBackend)(
+        connection
+    )
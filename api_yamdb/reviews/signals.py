@@ -0,0 +1,128 @@
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+
+from reviews.common import RatingService, TitleVersionService
+from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.search import get_search_backend
+from users.models import User
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        RatingService.apply_delta(instance.title_id, instance.score, 1)
+    else:
+        old_score = getattr(instance, '_loaded_score', None)
+        if old_score is None:
+            # Экземпляр собран не из БД: прежняя оценка неизвестна,
+            # поэтому пересчитываем агрегаты произведения целиком.
+            RatingService.recalculate(
+                Title.objects.filter(pk=instance.title_id)
+            )
+            TitleVersionService.touch(instance.title_id)
+        elif old_score != instance.score:
+            RatingService.apply_delta(
+                instance.title_id, instance.score - old_score, 0
+            )
+        else:
+            TitleVersionService.touch(instance.title_id)
+    instance._loaded_score = instance.score
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    # Review.delete перечитывает оценку из БД; каскадное удаление
+    # передаёт экземпляры, только что загруженные из БД.
+    score = getattr(instance, '_deleted_score', instance.score)
+    if score is None:
+        # Строку уже удалил параллельный запрос и учёл её в агрегатах.
+        return
+    RatingService.apply_delta(instance.title_id, -score, -1)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    TitleVersionService.touch_by_review(instance.review_id)
+
+
+@receiver(pre_save, sender=User)
+def author_saving(sender, instance, raw=False, **kwargs):
+    # После сохранения загруженное имя уже перезаписано.
+    instance._username_changed = not raw and instance.is_username_changed()
+
+
+@receiver(post_save, sender=User)
+def author_saved(sender, instance, **kwargs):
+    # Имя автора входит в ответы лент отзывов и комментариев.
+    if getattr(instance, '_username_changed', False):
+        TitleVersionService.touch_by_author(instance.pk)
+
+
+@receiver(post_save, sender=Title)
+def title_saved(sender, instance, raw=False, using=None, **kwargs):
+    if raw:
+        return
+    get_search_backend(using).index([instance.pk])
+
+
+@receiver(post_delete, sender=Title)
+def title_deleted(sender, instance, using=None, **kwargs):
+    get_search_backend(using).remove([instance.pk])
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, instance, action, reverse, pk_set,
+                         using=None, **kwargs):
+    if not reverse:
+        title_ids = [instance.pk]
+    elif action == 'pre_clear':
+        # После очистки связей уже не узнать, какие произведения затронуты.
+        instance._title_ids = list(
+            instance.title_set.values_list('pk', flat=True)
+        )
+        return
+    elif action == 'post_clear':
+        title_ids = getattr(instance, '_title_ids', [])
+    else:
+        title_ids = pk_set or []
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        get_search_backend(using).index(title_ids)
+        TitleVersionService.touch_many(title_ids)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Genre)
+def title_group_saved(sender, instance, created, raw=False, using=None,
+                      **kwargs):
+    if raw or created:
+        return
+    title_ids = get_group_title_ids(instance)
+    get_search_backend(using).index(title_ids)
+    TitleVersionService.touch_many(title_ids)
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Genre)
+def title_group_deleting(sender, instance, **kwargs):
+    instance._title_ids = get_group_title_ids(instance)
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Genre)
+def title_group_deleted(sender, instance, using=None, **kwargs):
+    title_ids = getattr(instance, '_title_ids', [])
+    get_search_backend(using).index(title_ids)
+    TitleVersionService.touch_many(title_ids)
+
+
+def get_group_title_ids(instance):
+    lookup = 'category' if isinstance(instance, Category) else 'genre'
+    return list(
+        Title.objects.filter(**{lookup: instance}).values_list('pk', flat=True)
+    )
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
-from users.models import User, Role
+from users.models import OutgoingEmail, User, Role
 
 
 @admin.register(User)
@@ -25,3 +25,14 @@ class UserAdmin(BaseUserAdmin):
             obj.is_staff = True
             obj.is_superuser = False
         obj.save()
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ('recipient', 'subject', 'created_at', 'attempts',
+                    'sent_at')
+    list_filter = ('sent_at',)
+    search_fields = ('recipient',)
+    readonly_fields = ('created_at', 'next_attempt_at', 'attempts',
+                       'last_error', 'sent_at')
+    empty_value_display = 'Не задано'
@@ -1,10 +1,18 @@
 import random
 import string
+from datetime import timedelta
 
 from django.conf import settings
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
 
 from reviews.constants import MAX_CONFORMATION_CODE_STRING
+from users.models import OutgoingEmail
+
+TOKEN_USER_CLAIMS = ("username", "role", "is_superuser", "token_version")
 
 
 class UserService:
@@ -17,11 +25,106 @@ class UserService:
         return confirmation_code
 
     @staticmethod
-    def send_confirmation_email(user, confirmation_code):
-        send_mail(
+    def queue_confirmation_email(user, confirmation_code):
+        """Ставит письмо с кодом в очередь; отправляет его send_emails."""
+        return EmailOutboxService.queue(
             "Код подтверждения",
             f"Ваш код подтверждения: {confirmation_code}",
-            settings.DEFAULT_FROM_EMAIL,
-            [user.email],
-            fail_silently=False,
+            user.email,
+        )
+
+    @staticmethod
+    def create_access_token(user):
+        """Access-токен с данными, достаточными для проверки прав."""
+        token = RefreshToken.for_user(user).access_token
+        for claim in TOKEN_USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        return str(token)
+
+
+class EmailOutboxService:
+    """Очередь исходящих писем.
+
+    Письма записываются в ``OutgoingEmail`` в транзакции запроса,
+    а отправляются пачками командой ``send_emails``. Неудачная отправка
+    откладывается с экспоненциально растущей паузой.
+    """
+
+    @staticmethod
+    def queue(subject, body, recipient):
+        return OutgoingEmail.objects.create(
+            subject=subject, body=body, recipient=recipient
+        )
+
+    @staticmethod
+    def get_pending(max_attempts):
+        return OutgoingEmail.objects.filter(
+            sent_at__isnull=True,
+            attempts__lt=max_attempts,
+            next_attempt_at__lte=timezone.now(),
         )
+
+    @staticmethod
+    def claim_batch(batch_size, max_attempts, lease):
+        """Забирает пачку писем, откладывая их на ``lease`` секунд.
+
+        Пока пачка отправляется, другие обработчики её не видят; если
+        обработчик упадёт, письма вернутся в очередь по истечении срока.
+        """
+        with transaction.atomic():
+            batch = list(
+                EmailOutboxService.get_pending(max_attempts)
+                .select_for_update(skip_locked=True)[:batch_size]
+            )
+            OutgoingEmail.objects.filter(
+                pk__in=[email.pk for email in batch]
+            ).update(next_attempt_at=timezone.now() + timedelta(seconds=lease))
+        return batch
+
+    @staticmethod
+    def deliver(batch):
+        """Отправляет пачку писем через одно соединение с почтовым сервером.
+
+        Не обращается к БД, поэтому может выполняться в отдельном потоке.
+        Возвращает отправленные письма и пары (письмо, ошибка).
+        """
+        sent, failed = [], []
+        connection = get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception as error:
+            return sent, [(email, error) for email in batch]
+        try:
+            for email in batch:
+                message = EmailMessage(
+                    email.subject,
+                    email.body,
+                    settings.DEFAULT_FROM_EMAIL,
+                    [email.recipient],
+                    connection=connection,
+                )
+                # Ошибка одного письма не должна мешать остальным в пачке.
+                try:
+                    connection.send_messages([message])
+                except Exception as error:
+                    failed.append((email, error))
+                else:
+                    sent.append(email)
+        finally:
+            connection.close()
+        return sent, failed
+
+    @staticmethod
+    def record_results(sent, failed, backoff):
+        now = timezone.now()
+        OutgoingEmail.objects.filter(
+            pk__in=[email.pk for email in sent]
+        ).update(sent_at=now, last_error="")
+        for email, error in failed:
+            OutgoingEmail.objects.filter(pk=email.pk).update(
+                attempts=F("attempts") + 1,
+                next_attempt_at=now + timedelta(
+                    seconds=backoff * 2 ** email.attempts
+                ),
+                last_error=str(error) or error.__class__.__name__,
+            )
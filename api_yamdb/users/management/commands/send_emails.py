@@ -0,0 +1,96 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from users.common import EmailOutboxService
+
+
+class Command(BaseCommand):
+    help = (
+        'Отправляет письма из очереди исходящих пачками, по одному '
+        'соединению с почтовым сервером на пачку.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Количество писем, отправляемых через одно соединение.'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Количество потоков, одновременно отправляющих пачки.'
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=5,
+            help='Количество попыток, после которого письмо не отправляется.'
+        )
+        parser.add_argument(
+            '--backoff',
+            type=int,
+            default=60,
+            help='Пауза перед второй попыткой в секундах, далее удваивается.'
+        )
+        parser.add_argument(
+            '--lease',
+            type=int,
+            default=300,
+            help='На сколько секунд взятая пачка скрывается от других '
+                 'обработчиков.'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться после опустошения очереди.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Пауза между проверками очереди в режиме --loop.'
+        )
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            while True:
+                # Работа с БД идёт в основном потоке, а потоки пула только
+                # общаются с почтовым сервером.
+                futures = []
+                for _ in range(options['workers']):
+                    batch = EmailOutboxService.claim_batch(
+                        options['batch_size'],
+                        options['max_attempts'],
+                        options['lease'],
+                    )
+                    if not batch:
+                        break
+                    futures.append(
+                        executor.submit(EmailOutboxService.deliver, batch)
+                    )
+                for future in futures:
+                    sent, failed = future.result()
+                    EmailOutboxService.record_results(
+                        sent, failed, options['backoff']
+                    )
+                    total_sent += len(sent)
+                    total_failed += len(failed)
+                    for email, error in failed:
+                        self.stderr.write(
+                            f'Не удалось отправить письмо {email.pk} '
+                            f'на {email.recipient}: {error}'
+                        )
+                if futures:
+                    continue
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Отправлено писем: {total_sent}, ошибок: {total_failed}.'))
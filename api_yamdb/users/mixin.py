@@ -1,5 +1,4 @@
-from users.validators import (validate_username_me,
-                              validate_username_regex)
+from users.validators import USERNAME_VALIDATORS
 
 
 class UsernameValidationMixin:
@@ -8,6 +7,6 @@ class UsernameValidationMixin:
         Проверяем имя пользователя на регулярное выражение
         и дополнительному правилу (запрет на использование "me" в username).
         """
-        validate_username_regex(username)
-        validate_username_me(username)
+        for validator in USERNAME_VALIDATORS:
+            validator(username)
         return username
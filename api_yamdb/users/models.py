@@ -2,6 +2,7 @@ from enum import Enum
 
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from reviews.constants import (
@@ -25,6 +26,10 @@ class Role(Enum):
 
 
 class User(AbstractUser):
+    # Поля, попадающие в access-токен: их понижение или смена отзывает
+    # ранее выданные токены.
+    TOKEN_DATA_FIELDS = ("username", "role", "is_superuser", "is_active")
+
     email = models.EmailField(
         _("email address"),
         unique=True,
@@ -61,6 +66,11 @@ class User(AbstractUser):
         choices=[(role.value, role.name) for role in Role],
         default=Role.USER.value,
     )
+    token_version = models.PositiveIntegerField(
+        _("Версия токенов"),
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         ordering = ("username", "role",)
@@ -70,6 +80,52 @@ class User(AbstractUser):
     def __str__(self):
         return f"{self.username} ({self.get_role_display()})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем данные из токена в том виде, в каком они были в БД,
+        # чтобы при понижении прав отозвать выданные токены.
+        instance._loaded_token_data = instance.get_token_data()
+        return instance
+
+    def get_token_data(self):
+        return tuple(
+            self.__dict__.get(name) for name in self.TOKEN_DATA_FIELDS
+        )
+
+    def is_token_data_outdated(self):
+        loaded = getattr(self, "_loaded_token_data", None)
+        if loaded is None:
+            return False
+        (
+            loaded_username, loaded_role, loaded_superuser, loaded_active
+        ) = loaded
+        username, role, is_superuser, is_active = self.get_token_data()
+        roles = [role.value for role in Role]
+        return (
+            loaded_username is not None and username != loaded_username
+            or loaded_role is not None
+            and roles.index(role) < roles.index(loaded_role)
+            or loaded_superuser and is_superuser is False
+            or loaded_active and is_active is False
+        )
+
+    def is_username_changed(self):
+        loaded = getattr(self, "_loaded_token_data", None)
+        return (
+            loaded is not None and loaded[0] is not None
+            and self.__dict__.get("username") != loaded[0]
+        )
+
+    def save(self, *args, **kwargs):
+        if self.is_token_data_outdated():
+            self.token_version += 1
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "token_version"}
+        super().save(*args, **kwargs)
+        self._loaded_token_data = self.get_token_data()
+
     @property
     def is_admin(self):
         return self.role == Role.ADMIN.value or self.is_superuser
@@ -77,3 +133,36 @@ class User(AbstractUser):
     @property
     def is_moderator(self):
         return self.role == Role.MODERATOR.value
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку."""
+
+    subject = models.CharField(_("Тема"), max_length=255)
+    body = models.TextField(_("Текст"))
+    recipient = models.EmailField(
+        _("Получатель"),
+        max_length=MAX_EMAIL_STRING,
+    )
+    created_at = models.DateTimeField(_("Создано"), auto_now_add=True)
+    next_attempt_at = models.DateTimeField(
+        _("Следующая попытка"),
+        default=timezone.now,
+    )
+    attempts = models.PositiveSmallIntegerField(_("Попытки"), default=0)
+    last_error = models.TextField(_("Последняя ошибка"), blank=True)
+    sent_at = models.DateTimeField(_("Отправлено"), null=True, blank=True)
+
+    class Meta:
+        ordering = ("next_attempt_at", "id")
+        indexes = (
+            models.Index(
+                fields=("sent_at", "next_attempt_at"),
+                name="outgoing_email_pending_idx",
+            ),
+        )
+        verbose_name = "Исходящее письмо"
+        verbose_name_plural = "Исходящие письма"
+
+    def __str__(self):
+        return f"{self.recipient}: {self.subject}"
@@ -2,18 +2,21 @@ from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator
 from django.utils.translation import gettext_lazy as _
 
+# Валидатор создаётся один раз при импорте: шаблон компилируется
+# не на каждый вызов, а однократно.
+username_regex_validator = RegexValidator(
+    regex=r"^[\w.@+-]+\Z",
+    message=_(
+        "Можно использовать только буквы "
+        "(включая буквы в верхнем и нижнем регистрах), "
+        "цифры и спецсимволы: ., @, +, - "
+    ),
+    code="invalid_username",
+)
+
 
 def validate_username_regex(username):
-    regex_validator = RegexValidator(
-        regex=r"^[\w.@+-]+\Z",
-        message=_(
-            "Можно использовать только буквы "
-            "(включая буквы в верхнем и нижнем регистрах), "
-            "цифры и спецсимволы: ., @, +, - "
-        ),
-        code="invalid_username",
-    )
-    regex_validator(username)
+    username_regex_validator(username)
 
 
 def validate_username_me(username):
@@ -23,3 +26,6 @@ def validate_username_me(username):
             code="invalid_username",
         )
     return username
+
+
+USERNAME_VALIDATORS = (validate_username_regex, validate_username_me)
@@ -1,6 +1,7 @@
 import os
 import sys
 
+import pytest
 from django.utils.version import get_version
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -33,3 +34,17 @@ assert get_version() < '4.0.0', 'Пожалуйста, используйте в
 pytest_plugins = [
     'tests.fixtures.fixture_user',
 ]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import cache
+
+    from api.autocomplete import autocomplete_index
+    from api.cache import get_response_cache
+    from api.throttling import get_throttle_backend
+
+    autocomplete_index.clear()
+    cache.clear()
+    get_response_cache().clear()
+    get_throttle_backend().clear()
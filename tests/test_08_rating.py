@@ -0,0 +1,135 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Category, Review, Title
+from tests.utils import create_reviews, create_single_review
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleRating:
+
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    REVIEW_DETAIL_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/'
+    )
+
+    def get_rating(self, client, title_id):
+        response = client.get(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title_id)
+        )
+        assert response.status_code == HTTPStatus.OK
+        return response.json().get('rating')
+
+    def test_01_rating_follows_reviews(self, client, admin_client, admin,
+                                       user_client, user):
+        reviews, titles = create_reviews(admin_client, {admin: admin_client})
+        title_id = titles[0]['id']
+        assert self.get_rating(client, title_id) == 5, (
+            'Проверьте, что после создания отзыва рейтинг произведения '
+            'обновляется.'
+        )
+
+        create_single_review(user_client, title_id, 'Отлично', 10)
+        title = Title.objects.get(pk=title_id)
+        assert (title.score_sum, title.reviews_count) == (15, 2), (
+            'Проверьте, что при создании отзыва сумма оценок и количество '
+            'отзывов произведения увеличиваются.'
+        )
+        assert self.get_rating(client, title_id) == 7
+
+        response = admin_client.patch(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=title_id, review_id=reviews[0]['id']
+            ),
+            data={'score': 9}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert Title.objects.get(pk=title_id).score_sum == 19, (
+            'Проверьте, что при изменении оценки отзыва сумма оценок '
+            'произведения корректируется на разницу оценок.'
+        )
+
+        response = admin_client.delete(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=title_id, review_id=reviews[0]['id']
+            )
+        )
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert self.get_rating(client, title_id) == 10
+
+        user.delete()
+        title = Title.objects.get(pk=title_id)
+        assert (title.score_sum, title.reviews_count, title.rating) == (
+            0, 0, None
+        ), (
+            'Проверьте, что при каскадном удалении отзывов вместе с '
+            'пользователем рейтинг произведения сбрасывается.'
+        )
+
+    def test_02_recalculate_ratings_command(self, admin_client, admin):
+        _, titles = create_reviews(admin_client, {admin: admin_client})
+        title_id = titles[0]['id']
+        Title.objects.filter(pk=title_id).update(
+            score_sum=100, reviews_count=7, rating=1.0
+        )
+        Review.objects.filter(title_id=title_id).update(score=8)
+
+        call_command('recalculate_ratings', batch_size=1)
+
+        title = Title.objects.get(pk=title_id)
+        assert (title.score_sum, title.reviews_count, title.rating) == (
+            8, 1, 8.0
+        ), (
+            'Проверьте, что команда `recalculate_ratings` восстанавливает '
+            'агрегаты рейтинга по таблице отзывов.'
+        )
+        assert Title.objects.get(pk=titles[1]['id']).rating is None
+
+    def test_03_stale_concurrent_updates(self, admin, user):
+        category = Category.objects.create(name='Фильм', slug='films')
+        title = Title.objects.create(name='Фильм', year=2000,
+                                     category=category)
+        Review.objects.create(title=title, author=admin, text='Отзыв',
+                              score=5)
+        Review.objects.create(title=title, author=user, text='Отзыв',
+                              score=5)
+        review_id = Review.objects.get(author=admin).pk
+
+        # Оба экземпляра загружены до правок, как в параллельных PATCH.
+        first = Review.objects.get(pk=review_id)
+        second = Review.objects.get(pk=review_id)
+        first.score = 7
+        first.save()
+        second.score = 9
+        second.save()
+
+        title.refresh_from_db()
+        assert (title.score_sum, title.reviews_count) == (14, 2), (
+            'Проверьте, что разница оценок считается от значения в БД, '
+            'а не от устаревшего значения, загруженного до правки.'
+        )
+
+    def test_04_stale_concurrent_delete(self, admin, user):
+        title = Title.objects.create(name='Фильм', year=2000)
+        Review.objects.create(title=title, author=admin, text='Отзыв',
+                              score=5)
+        Review.objects.create(title=title, author=user, text='Отзыв',
+                              score=5)
+        review_id = Review.objects.get(author=admin).pk
+
+        # Экземпляры загружены до правки, как в параллельных запросах.
+        stale = Review.objects.get(pk=review_id)
+        duplicate = Review.objects.get(pk=review_id)
+        edited = Review.objects.get(pk=review_id)
+        edited.score = 9
+        edited.save()
+        stale.delete()
+        duplicate.delete()
+
+        title.refresh_from_db()
+        assert (title.score_sum, title.reviews_count) == (5, 1), (
+            'Проверьте, что при удалении отзыва из агрегатов вычитается '
+            'оценка из БД, а повторное удаление не учитывается дважды.'
+        )
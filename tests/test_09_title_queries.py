@@ -0,0 +1,62 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, Genre, Review, Title
+
+
+def create_catalog(titles_count, author):
+    category = Category.objects.create(name='Фильм', slug='films')
+    genres = [
+        Genre.objects.create(name='Драма', slug='drama'),
+        Genre.objects.create(name='Комедия', slug='comedy'),
+    ]
+    for idx in range(titles_count):
+        title = Title.objects.create(
+            name=f'Произведение {idx}', year=2000, category=category
+        )
+        title.genre.set(genres)
+        Review.objects.create(
+            title=title, author=author, text='Отзыв', score=7
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09TitleQueries:
+
+    TITLES_URL = '/api/v1/titles/'
+    TITLES_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+
+    def count_queries(self, client, url):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == 200
+        return len(context.captured_queries)
+
+    def test_01_title_list_constant_queries(self, client, admin):
+        create_catalog(1, admin)
+        single_title_queries = self.count_queries(client, self.TITLES_URL)
+
+        Title.objects.all().delete()
+        Category.objects.all().delete()
+        Genre.objects.all().delete()
+        create_catalog(15, admin)
+        full_page_queries = self.count_queries(client, self.TITLES_URL)
+
+        assert full_page_queries == single_title_queries, (
+            f'Проверьте, что GET-запрос к `{self.TITLES_URL}` выполняет '
+            'одинаковое число SQL-запросов независимо от количества '
+            'произведений на странице. Сейчас: '
+            f'{single_title_queries} и {full_page_queries}.'
+        )
+
+    def test_02_title_detail_queries(self, client, admin):
+        create_catalog(1, admin)
+        title = Title.objects.get()
+        queries = self.count_queries(
+            client, self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=title.id)
+        )
+        assert queries <= 3, (
+            'Проверьте, что категория, жанры и отзывы произведения '
+            'загружаются через select_related/prefetch_related.'
+        )
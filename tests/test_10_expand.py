@@ -0,0 +1,116 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.constants import MAX_EXPANDED_ITEMS
+from reviews.models import Category, Review, Title
+from tests.utils import create_comments
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10ExpandRelations:
+
+    TITLES_URL = '/api/v1/titles/'
+    TITLES_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+
+    def test_01_title_reviews_expand(self, client, admin_client, admin,
+                                     user_client, user):
+        _, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=titles[0]['id'])
+
+        data = client.get(url).json()
+        assert 'reviews' not in data, (
+            f'Проверьте, что ответ на GET-запрос к `{url}` не содержит '
+            'список отзывов, если он не запрошен через `?expand=reviews`.'
+        )
+        assert data.get('reviews_count') == len(reviews)
+
+        data = client.get(url, {'expand': 'reviews'}).json()
+        assert sorted(data['reviews']['results']) == sorted(
+            review['id'] for review in reviews
+        ), (
+            f'Проверьте, что GET-запрос к `{url}?expand=reviews` возвращает '
+            'идентификаторы отзывов произведения.'
+        )
+        assert data['reviews']['next'] is None
+
+    def test_02_review_comments_expand(self, client, admin_client, admin,
+                                       user_client, user):
+        comments, _, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+
+        results = client.get(url).json()['results']
+        assert all('comments' not in review for review in results)
+        assert sorted(
+            review['comments_count'] for review in results
+        ) == [0, len(comments)], (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'количество комментариев в поле `comments_count`.'
+        )
+
+        results = client.get(url, {'expand': 'comments'}).json()['results']
+        expanded = [
+            review for review in results if review['comments']['results']
+        ]
+        assert len(expanded) == 1
+        assert sorted(expanded[0]['comments']['results']) == sorted(
+            comment['id'] for comment in comments
+        )
+        assert expanded[0]['comments']['next'] is None
+
+    def test_03_expand_next_slice(self, client, admin, user):
+        title = Title.objects.create(name='Произведение', year=2000)
+        authors = [admin, user] + [
+            type(user).objects.create(
+                username=f'author{number}', email=f'author{number}@yamdb.fake'
+            )
+            for number in range(MAX_EXPANDED_ITEMS)
+        ]
+        for author in authors:
+            Review.objects.create(
+                title=title, author=author, text='Отзыв', score=5
+            )
+        url = self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=title.pk)
+
+        expanded = client.get(url, {'expand': 'reviews'}).json()['reviews']
+        assert len(expanded['results']) == MAX_EXPANDED_ITEMS
+        assert expanded['next'], (
+            f'Проверьте, что GET-запрос к `{url}?expand=reviews` возвращает '
+            'в `next` ссылку на продолжение ленты отзывов, если показаны '
+            'не все отзывы.'
+        )
+        rest = client.get(expanded['next']).json()
+        shown = expanded['results'] + [
+            review['id'] for review in rest['results']
+        ]
+        assert sorted(shown) == sorted(
+            Review.objects.filter(title=title).values_list('id', flat=True)
+        )
+
+    def test_04_expand_query_count(self, client, admin):
+        category = Category.objects.create(name='Книги', slug='books')
+
+        def count_queries(titles_count):
+            for number in range(titles_count - Title.objects.count()):
+                title = Title.objects.create(
+                    name=f'Произведение {number}', year=2000,
+                    category=category
+                )
+                Review.objects.create(
+                    title=title, author=admin, text='Отзыв', score=5
+                )
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(self.TITLES_URL, {'expand': 'reviews'})
+            assert response.status_code == 200
+            return len(context.captured_queries)
+
+        assert count_queries(1) == count_queries(5), (
+            f'Проверьте, что GET-запрос к `{self.TITLES_URL}?expand=reviews` '
+            'выполняет одно и то же число запросов к БД независимо от числа '
+            'произведений на странице.'
+        )
@@ -0,0 +1,94 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Comment
+from tests.utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11FeedPagination:
+
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    COMMENTS_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+    )
+
+    def create_feed(self, admin_client, admin, comments_count):
+        reviews, titles = create_reviews(admin_client, {admin: admin_client})
+        Comment.objects.bulk_create(
+            Comment(review_id=reviews[0]['id'], author=admin, text=str(idx))
+            for idx in range(comments_count)
+        )
+        return self.COMMENTS_URL_TEMPLATE.format(
+            title_id=titles[0]['id'], review_id=reviews[0]['id']
+        )
+
+    def test_01_cursor_walks_whole_feed(self, client, admin_client, admin):
+        url = self.create_feed(admin_client, admin, 7)
+
+        seen = []
+        next_url = f'{url}?pagination=cursor&limit=3'
+        while next_url:
+            response = client.get(next_url)
+            assert response.status_code == HTTPStatus.OK
+            data = response.json()
+            assert 'count' not in data, (
+                'Проверьте, что в курсорном режиме пагинации не '
+                'выполняется подсчёт общего количества объектов.'
+            )
+            assert len(data['results']) <= 3
+            seen.extend(comment['id'] for comment in data['results'])
+            next_url = data['next']
+
+        expected = list(
+            Comment.objects.order_by('-pub_date', '-id')
+            .values_list('id', flat=True)
+        )
+        assert seen == expected, (
+            f'Проверьте, что курсорная пагинация `{url}` без пропусков и '
+            'повторов проходит ленту в порядке `(-pub_date, -id)`.'
+        )
+
+    def test_02_limit_offset_still_default(self, client, admin_client,
+                                           admin):
+        url = self.create_feed(admin_client, admin, 4)
+
+        data = client.get(url, {'limit': 2, 'offset': 2}).json()
+        assert data['count'] == 4
+        assert len(data['results']) == 2
+
+    def test_03_invalid_cursor(self, client, admin_client, admin):
+        url = self.create_feed(admin_client, admin, 1)
+
+        response = client.get(url, {'cursor': 'broken'})
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_04_review_cursor_uses_index(self, client, admin_client, admin):
+        if connection.vendor != 'sqlite':
+            pytest.skip('План запроса проверяется на SQLite.')
+        _, titles = create_reviews(admin_client, {admin: admin_client})
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, {'pagination': 'cursor'})
+        assert response.status_code == HTTPStatus.OK
+        assert 'comments_count' in response.json()['results'][0]
+        sql = next(
+            query['sql'] for query in context.captured_queries
+            if 'FROM "reviews_review"' in query['sql']
+            and 'ORDER BY' in query['sql']
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            plan = ' | '.join(row[-1] for row in cursor.fetchall())
+        assert 'review_title_pub_date_idx' in plan, (
+            'Проверьте, что лента отзывов в курсорном режиме читается '
+            f'по индексу `review_title_pub_date_idx`. План: {plan}'
+        )
+        assert 'TEMP B-TREE' not in plan, (
+            'Проверьте, что лента отзывов сортируется по индексу, '
+            f'а не во временном дереве. План: {plan}'
+        )
@@ -0,0 +1,87 @@
+import os
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.cache import get_generations
+from reviews.models import Category, Title
+from tests.utils import create_categories
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12CountCache:
+
+    CATEGORIES_URL = '/api/v1/categories/'
+
+    def count_queries(self, client, params=None):
+        with CaptureQueriesContext(connection) as context:
+            data = client.get(self.CATEGORIES_URL, params).json()
+        count_queries = [
+            query for query in context.captured_queries
+            if 'COUNT(' in query['sql']
+        ]
+        return data['count'], len(count_queries)
+
+    def test_01_count_cached_and_invalidated(self, client, admin_client):
+        create_categories(admin_client)
+
+        assert self.count_queries(client) == (2, 1)
+        assert self.count_queries(client) == (2, 0), (
+            f'Проверьте, что повторный GET-запрос к `{self.CATEGORIES_URL}` '
+            'берёт количество объектов из кэша.'
+        )
+        assert self.count_queries(client, {'search': 'Фильм'}) == (1, 1), (
+            'Проверьте, что количество кэшируется отдельно для разных '
+            'параметров фильтрации.'
+        )
+
+        admin_client.post(
+            self.CATEGORIES_URL, data={'name': 'Музыка', 'slug': 'music'}
+        )
+        assert self.count_queries(client) == (3, 1), (
+            'Проверьте, что кэш количества сбрасывается при создании '
+            'объекта.'
+        )
+
+        admin_client.delete(f'{self.CATEGORIES_URL}music/')
+        assert self.count_queries(client) == (2, 1), (
+            'Проверьте, что кэш количества сбрасывается при удалении '
+            'объекта.'
+        )
+
+    def test_02_stale_count_does_not_limit_page(self, client, admin_client):
+        create_categories(admin_client)
+        assert self.count_queries(client) == (2, 1)
+
+        # bulk_create не вызывает сигналы, и количество в кэше устаревает.
+        Category.objects.bulk_create(
+            Category(name=f'Категория {number}', slug=f'category-{number}')
+            for number in range(12)
+        )
+        # Номер страницы не входит в ключ количества, но меняет ключ
+        # кэша ответов, поэтому ответ собирается заново.
+        data = client.get(self.CATEGORIES_URL, {'page': 1}).json()
+        assert data['count'] == 2
+        assert len(data['results']) == 10, (
+            'Проверьте, что устаревшее количество из кэша не ограничивает '
+            'число объектов на странице.'
+        )
+        assert data['next'], (
+            'Проверьте, что ссылка на следующую страницу определяется '
+            'по наличию следующих объектов, а не по количеству из кэша.'
+        )
+        response = client.get(data['next'])
+        assert response.status_code == 200
+        assert len(response.json()['results']) == 4
+        assert response.json()['next'] is None
+
+    def test_03_recalculate_ratings_resets_cache(self):
+        Title.objects.create(name='Произведение', year=2000)
+        generation, = get_generations(Title)
+        call_command('recalculate_ratings', stdout=open(os.devnull, 'w'))
+        assert get_generations(Title) != (generation,), (
+            'Проверьте, что команда `recalculate_ratings` сбрасывает '
+            'кэшированные списки произведений.'
+        )
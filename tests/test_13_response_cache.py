@@ -0,0 +1,81 @@
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api.cache import get_generations
+from reviews.models import Category, Genre, Title
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13ResponseCache:
+
+    TITLES_URL = '/api/v1/titles/'
+    TITLES_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+
+    def get(self, client, url, params=None):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, params)
+        assert response.status_code == 200
+        return response.json(), len(context.captured_queries)
+
+    def test_01_cached_catalog_reads(self, client, admin_client):
+        create_titles(admin_client)
+
+        data, _ = self.get(client, self.TITLES_URL, {'year': 1984})
+        cached_data, queries = self.get(
+            client, self.TITLES_URL, {'year': 1984}
+        )
+        assert queries == 0, (
+            f'Проверьте, что повторный GET-запрос к `{self.TITLES_URL}` '
+            'отдаётся из кэша без обращения к базе данных.'
+        )
+        assert cached_data == data
+
+        _, queries = self.get(client, '/api/v1/genres/')
+        assert queries > 0
+        _, queries = self.get(client, '/api/v1/genres/')
+        assert queries == 0
+
+    def test_02_cache_invalidated_on_writes(self, client, admin_client,
+                                            user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=titles[0]['id'])
+
+        data, _ = self.get(client, url)
+        assert data['rating'] is None
+
+        create_single_review(user_client, titles[0]['id'], 'Отлично', 9)
+        data, _ = self.get(client, url)
+        assert data['rating'] == 9, (
+            'Проверьте, что кэш произведения сбрасывается при появлении '
+            'нового отзыва.'
+        )
+
+        admin_client.patch(url, data={'name': 'Терминатор 2'})
+        data, _ = self.get(client, url)
+        assert data['name'] == 'Терминатор 2'
+
+        admin_client.patch(url, data={'genre': ['drama']})
+        data, _ = self.get(client, url)
+        assert [genre['slug'] for genre in data['genre']] == ['drama'], (
+            'Проверьте, что кэш произведения сбрасывается при изменении '
+            'жанров.'
+        )
+
+    def test_03_generation_bumped_on_commit(self):
+        generations = get_generations(Category, Title)
+        with transaction.atomic():
+            title = Title.objects.create(name='Произведение', year=2000)
+            Category.objects.create(name='Книги', slug='books')
+            title.genre.set([Genre.objects.create(name='Роман', slug='novel')])
+            assert get_generations(Category, Title) == generations, (
+                'Проверьте, что поколения данных сдвигаются только после '
+                'фиксации транзакции: иначе параллельный запрос закэширует '
+                'прежние строки под новым поколением.'
+            )
+        assert all(
+            new > old for new, old in zip(
+                get_generations(Category, Title), generations
+            )
+        )
@@ -0,0 +1,108 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_comments, create_single_comment, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14ConditionalGet:
+
+    TITLES_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    COMMENTS_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+    )
+
+    def test_01_not_modified_until_feed_changes(self, client, admin_client,
+                                                admin):
+        _, reviews, titles = create_comments(
+            admin_client, {admin: admin_client}
+        )
+        title_id = titles[0]['id']
+        urls = (
+            self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=title_id),
+            self.REVIEWS_URL_TEMPLATE.format(title_id=title_id),
+            self.COMMENTS_URL_TEMPLATE.format(
+                title_id=title_id, review_id=reviews[0]['id']
+            ),
+        )
+        etags = {}
+        for url in urls:
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK
+            assert response.has_header('Last-Modified')
+            etags[url] = response['ETag']
+            response = client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+                f'Проверьте, что GET-запрос к `{url}` с заголовком '
+                '`If-None-Match` возвращает 304, если данные не менялись.'
+            )
+
+        create_single_comment(
+            admin_client, title_id, reviews[0]['id'], 'Новый комментарий'
+        )
+        for url in urls:
+            response = client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что после изменения ленты GET-запрос к `{url}` '
+                'со старым `If-None-Match` возвращает актуальные данные.'
+            )
+
+    def test_02_missing_review_is_not_found(self, client, admin_client,
+                                            admin):
+        _, reviews, titles = create_comments(
+            admin_client, {admin: admin_client}
+        )
+        url = self.COMMENTS_URL_TEMPLATE.format(
+            title_id=titles[1]['id'], review_id=reviews[0]['id']
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH='*')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    @pytest.mark.parametrize('group', ('category', 'genre'))
+    def test_03_group_delete_changes_title(self, client, admin_client,
+                                           group):
+        titles, _, _ = create_titles(admin_client)
+        title = titles[0]
+        url = self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=title['id'])
+        etag = client.get(url)['ETag']
+        assert client.get(
+            url, HTTP_IF_NONE_MATCH=etag
+        ).status_code == HTTPStatus.NOT_MODIFIED
+
+        slug = title['category'] if group == 'category' else (
+            title['genre'][0]
+        )
+        groups_url = '/api/v1/categories/' if group == 'category' else (
+            '/api/v1/genres/'
+        )
+        response = admin_client.delete(f'{groups_url}{slug}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что после удаления связанного объекта `{group}` '
+            f'GET-запрос к `{url}` со старым `If-None-Match` возвращает '
+            'актуальные данные.'
+        )
+
+    def test_04_author_rename_changes_feed(self, client, admin_client,
+                                           admin, user, user_client):
+        _, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        etag = client.get(url)['ETag']
+
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'username': 'newname'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после смены имени автора GET-запрос к '
+            f'`{url}` со старым `If-None-Match` возвращает актуальные данные.'
+        )
+        assert 'newname' in {
+            review['author'] for review in response.json()['results']
+        }
@@ -0,0 +1,183 @@
+import csv
+import io
+import json
+import os
+import shutil
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.management.commands.import_from_csv import Command
+from reviews.models import Category, Comment, Genre, Review, Title
+from tests.conftest import MANAGE_PATH
+from users.models import User
+
+DATA_DIR = os.path.join(
+    MANAGE_PATH, 'reviews', 'management', 'commands', 'data'
+)
+
+
+def count_rows(file_name):
+    with open(os.path.join(DATA_DIR, file_name), encoding='utf-8') as f:
+        return sum(1 for _ in csv.DictReader(f))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15ImportCsv:
+
+    FILE_TO_MODEL = {
+        'users.csv': User,
+        'category.csv': Category,
+        'genre.csv': Genre,
+        'titles.csv': Title,
+        'review.csv': Review,
+        'comments.csv': Comment,
+    }
+
+    @pytest.fixture(autouse=True)
+    def work_dir(self, tmp_path, monkeypatch):
+        # Контрольная точка и отклонённые строки пишутся в текущую папку.
+        monkeypatch.chdir(tmp_path)
+
+    def test_01_import_loads_all_rows(self):
+        with CaptureQueriesContext(connection) as context:
+            call_command('import_from_csv', stdout=open(os.devnull, 'w'))
+
+        total_rows = count_rows('genre_title.csv')
+        for file_name, model in self.FILE_TO_MODEL.items():
+            rows = count_rows(file_name)
+            total_rows += rows
+            assert model.objects.count() == rows, (
+                f'Проверьте, что команда `import_from_csv` загружает все '
+                f'строки файла `{file_name}`.'
+            )
+        assert Title.genre.through.objects.count() == count_rows(
+            'genre_title.csv'
+        )
+        assert len(context.captured_queries) < total_rows / 2, (
+            'Проверьте, что команда `import_from_csv` не выполняет '
+            'отдельные запросы для каждой строки CSV.'
+        )
+        for model in (*self.FILE_TO_MODEL.values(), Title.genre.through):
+            inserts = [
+                query for query in context.captured_queries
+                if query['sql'].startswith('INSERT')
+                and f'INTO "{model._meta.db_table}"' in query['sql']
+            ]
+            assert len(inserts) == 1, (
+                'Проверьте, что команда `import_from_csv` сохраняет строки '
+                'пакетами, а не по одной.'
+            )
+        title = Title.objects.filter(reviews__isnull=False).first()
+        assert title.reviews_count == title.reviews.count()
+
+    def test_02_import_is_idempotent(self):
+        call_command('import_from_csv', stdout=open(os.devnull, 'w'))
+        call_command('import_from_csv', stdout=open(os.devnull, 'w'))
+
+        for file_name, model in self.FILE_TO_MODEL.items():
+            assert model.objects.count() == count_rows(file_name)
+
+    def test_03_stages_follow_foreign_keys(self):
+        stages = Command.get_stages({
+            'comments.csv': 'reviews.Comment',
+            'review.csv': 'reviews.Review',
+            'genre_title.csv': 'reviews.Title_genre',
+            'titles.csv': 'reviews.Title',
+            'genre.csv': 'reviews.Genre',
+            'category.csv': 'reviews.Category',
+            'users.csv': 'users.User',
+        })
+        assert [sorted(stage) for stage in stages] == [
+            ['category.csv', 'genre.csv', 'users.csv'],
+            ['titles.csv'],
+            ['genre_title.csv', 'review.csv'],
+            ['comments.csv'],
+        ], (
+            'Проверьте, что файлы загружаются этапами по зависимостям '
+            'внешних ключей.'
+        )
+
+    def test_04_workers_mode_loads_all_rows(self):
+        call_command(
+            'import_from_csv', workers=4, batch_size=10,
+            stdout=open(os.devnull, 'w')
+        )
+
+        for file_name, model in self.FILE_TO_MODEL.items():
+            assert model.objects.count() == count_rows(file_name)
+
+    @pytest.fixture
+    def data_dir(self, tmp_path):
+        for file_name in (*self.FILE_TO_MODEL, 'genre_title.csv'):
+            shutil.copy(os.path.join(DATA_DIR, file_name), tmp_path)
+        return tmp_path
+
+    def test_05_bad_rows_quarantined(self, data_dir):
+        with open(data_dir / 'review.csv', 'a', encoding='utf-8') as f:
+            f.write('\n9001,1,Отзыв,100,5,вчера\n')
+        with open(data_dir / 'comments.csv', 'a', encoding='utf-8') as f:
+            f.write('\n9002,777777,Комментарий,100,2020-01-13T23:20:02.422Z\n')
+
+        call_command(
+            'import_from_csv', data_dir=str(data_dir),
+            stdout=open(os.devnull, 'w')
+        )
+
+        assert Review.objects.count() == count_rows('review.csv')
+        assert Comment.objects.count() == count_rows('comments.csv')
+        with open(data_dir / 'review.csv.rejected.csv',
+                  encoding='utf-8') as f:
+            rejected = list(csv.DictReader(f))
+        assert [row['id'] for row in rejected] == ['9001'], (
+            'Проверьте, что строки с ошибками формата попадают в файл '
+            'отклонённых строк вместе с причиной.'
+        )
+        assert 'ошибка формата' in rejected[0]['reason']
+        with open(data_dir / 'comments.csv.rejected.csv',
+                  encoding='utf-8') as f:
+            rejected = list(csv.DictReader(f))
+        assert rejected[0]['id'] == '9002'
+        assert 'review_id' in rejected[0]['reason']
+        assert not os.path.exists(data_dir / 'import_checkpoint.json')
+
+    def test_06_resume_after_failure(self, data_dir, monkeypatch):
+        original_flush = Command.flush
+        calls = []
+
+        def failing_flush(self, loader, batch, stats):
+            if loader['file'] == 'review.csv':
+                calls.append(batch)
+                if len(calls) == 3:
+                    raise RuntimeError('Обрыв соединения')
+            return original_flush(self, loader, batch, stats)
+
+        monkeypatch.setattr(Command, 'flush', failing_flush)
+        with pytest.raises(RuntimeError):
+            call_command(
+                'import_from_csv', data_dir=str(data_dir), batch_size=10,
+                stdout=open(os.devnull, 'w')
+            )
+        assert Review.objects.count() == 20
+        with open(data_dir / 'import_checkpoint.json',
+                  encoding='utf-8') as f:
+            checkpoint = json.load(f)
+        assert checkpoint['review.csv']['row'] == 20
+        assert checkpoint['users.csv']['done']
+
+        monkeypatch.setattr(Command, 'flush', original_flush)
+        out = io.StringIO()
+        call_command(
+            'import_from_csv', data_dir=str(data_dir), batch_size=10,
+            resume=True, stdout=out
+        )
+        assert 'review.csv: продолжение со строки 21' in out.getvalue(), (
+            'Проверьте, что с флагом `--resume` загрузка продолжается с '
+            'контрольной точки.'
+        )
+        assert 'Файл users.csv уже загружен' in out.getvalue()
+        for file_name, model in self.FILE_TO_MODEL.items():
+            assert model.objects.count() == count_rows(file_name)
+        assert not os.path.exists(data_dir / 'review.csv.rejected.csv')
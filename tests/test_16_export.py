@@ -0,0 +1,64 @@
+import csv
+import gzip
+import json
+import os
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Title
+from tests.test_15_import_csv import DATA_DIR, count_rows
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16Export:
+
+    FILES = (
+        'users', 'category', 'genre', 'titles', 'genre_title', 'review',
+        'comments'
+    )
+
+    def test_01_csv_export_matches_import_layout(self, tmp_path):
+        call_command('import_from_csv', stdout=open(os.devnull, 'w'))
+        call_command('export', str(tmp_path), stdout=open(os.devnull, 'w'))
+
+        for name in self.FILES:
+            with open(os.path.join(DATA_DIR, f'{name}.csv'),
+                      encoding='utf-8') as f:
+                source_columns = next(csv.reader(f))
+            with open(tmp_path / f'{name}.csv', encoding='utf-8') as f:
+                exported = list(csv.reader(f))
+            assert exported[0] == source_columns, (
+                f'Проверьте, что колонки выгрузки `{name}.csv` совпадают с '
+                'файлами для `import_from_csv`.'
+            )
+            assert len(exported) - 1 == count_rows(f'{name}.csv')
+
+        with open(os.path.join(DATA_DIR, 'category.csv'),
+                  encoding='utf-8') as f:
+            source = list(csv.reader(f))
+        with open(tmp_path / 'category.csv', encoding='utf-8') as f:
+            assert list(csv.reader(f)) == source
+
+    def test_02_jsonl_gzip_export(self, tmp_path):
+        call_command('import_from_csv', stdout=open(os.devnull, 'w'))
+        call_command(
+            'export', str(tmp_path), format='jsonl', gzip=True,
+            chunk_size=5, stdout=open(os.devnull, 'w')
+        )
+
+        with gzip.open(tmp_path / 'titles.jsonl.gz', 'rt',
+                       encoding='utf-8') as f:
+            titles = [json.loads(line) for line in f]
+        assert len(titles) == Title.objects.count()
+        first = Title.objects.order_by('pk').first()
+        assert titles[0] == {
+            'id': first.id,
+            'name': first.name,
+            'year': first.year,
+            'category': first.category_id,
+        }
+        with gzip.open(tmp_path / 'review.jsonl.gz', 'rt',
+                       encoding='utf-8') as f:
+            review = json.loads(f.readline())
+        assert review['pub_date'].endswith('Z')
@@ -0,0 +1,70 @@
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Title
+from tests.test_09_title_queries import create_catalog
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17TitleExport:
+
+    EXPORT_URL = '/api/v1/titles/export/'
+
+    def test_01_export_permissions(self, client, user_client,
+                                   moderator_client):
+        response = client.get(self.EXPORT_URL)
+        assert response.status_code == 401, (
+            f'Проверьте, что `{self.EXPORT_URL}` недоступен анонимам.'
+        )
+        for non_admin_client in (user_client, moderator_client):
+            response = non_admin_client.get(self.EXPORT_URL)
+            assert response.status_code == 403, (
+                f'Проверьте, что `{self.EXPORT_URL}` доступен только '
+                'администратору.'
+            )
+
+    def test_02_export_streams_all_titles(self, admin_client, admin,
+                                          monkeypatch):
+        from api.views import TitleViewSet
+
+        monkeypatch.setattr(TitleViewSet, 'export_chunk_size', 4)
+        create_catalog(10, admin)
+
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.get(self.EXPORT_URL)
+            assert response.status_code == 200
+            assert response.streaming, (
+                'Проверьте, что выгрузка отдаётся потоком '
+                '(`StreamingHttpResponse`).'
+            )
+            assert response['Content-Type'].startswith(
+                'application/x-ndjson'
+            )
+            lines = b''.join(response.streaming_content).decode().splitlines()
+
+        titles = [json.loads(line) for line in lines]
+        assert [title['id'] for title in titles] == list(
+            Title.objects.order_by('pk').values_list('pk', flat=True)
+        ), 'Проверьте, что выгружаются все произведения по порядку.'
+        assert titles[0] == {
+            'id': titles[0]['id'],
+            'name': 'Произведение 0',
+            'year': 2000,
+            'description': '',
+            'rating': 7.0,
+            'category': 'films',
+            'genre': ['comedy', 'drama'],
+        }
+        select_queries = [
+            query for query in context.captured_queries
+            if 'reviews_title' in query['sql']
+            and query['sql'].startswith('SELECT')
+        ]
+        # Три порции по два запроса и пустая завершающая порция.
+        assert len(select_queries) == 7, (
+            'Проверьте, что выгрузка читает произведения порциями по ключу '
+            'и загружает жанры одним запросом на порцию.'
+        )
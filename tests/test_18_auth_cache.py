@@ -0,0 +1,79 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def user_queries(client, url, method='get', **kwargs):
+    with CaptureQueriesContext(connection) as context:
+        response = getattr(client, method)(url, **kwargs)
+    queries = [
+        query['sql'] for query in context.captured_queries
+        if 'FROM "users_user"' in query['sql']
+    ]
+    return response, queries
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18AuthCache:
+
+    USERS_URL = '/api/v1/users/'
+    USER_DETAIL_URL_TEMPLATE = '/api/v1/users/{username}/'
+    CATEGORIES_URL = '/api/v1/categories/'
+
+    def test_01_cached_user_skips_query(self, admin_client):
+        response, queries = user_queries(admin_client, self.CATEGORIES_URL)
+        assert response.status_code == 200
+        assert len(queries) == 1
+
+        response, queries = user_queries(admin_client, self.CATEGORIES_URL)
+        assert response.status_code == 200
+        assert not queries, (
+            'Проверьте, что при повторном запросе с тем же токеном '
+            'пользователь берётся из кэша, а не из БД.'
+        )
+
+    def test_02_role_change_invalidates_cache(self, admin_client, user,
+                                              user_client):
+        response = user_client.get(self.USERS_URL)
+        assert response.status_code == 403
+
+        response = admin_client.patch(
+            self.USER_DETAIL_URL_TEMPLATE.format(username=user.username),
+            data={'role': 'admin'}
+        )
+        assert response.status_code == 200
+
+        response = user_client.get(self.USERS_URL)
+        assert response.status_code == 200, (
+            'Проверьте, что смена роли пользователя сбрасывает его '
+            'закэшированные данные аутентификации.'
+        )
+
+    def test_03_deleted_or_inactive_user(self, user, user_client):
+        assert user_client.get(self.USERS_URL + 'me/').status_code == 200
+
+        user.is_active = False
+        user.save()
+        assert user_client.get(self.USERS_URL + 'me/').status_code == 401
+
+        user.delete()
+        assert user_client.get(self.USERS_URL + 'me/').status_code == 401
+
+    def test_04_me_returns_full_profile(self, user, user_client):
+        user_client.get(self.CATEGORIES_URL)
+        response, queries = user_queries(user_client, self.USERS_URL + 'me/')
+        assert response.status_code == 200
+        assert len(queries) == 1, (
+            f'Проверьте, что GET-запрос к `{self.USERS_URL}me/` читает '
+            'профиль пользователя из БД одним запросом.'
+        )
+        assert response.json()['bio'] == user.bio
+        assert response.json()['email'] == user.email
+
+        response = user_client.patch(
+            self.USERS_URL + 'me/', data={'bio': 'Новая биография'}
+        )
+        assert response.status_code == 200
+        user.refresh_from_db()
+        assert user.bio == 'Новая биография'
+        assert user.email == 'testuser@yamdb.fake'
@@ -0,0 +1,140 @@
+import pytest
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api import authentication
+from tests.test_18_auth_cache import user_queries
+
+
+def client_with_token(token):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+@pytest.fixture
+def stateless(settings):
+    settings.AUTH_USER_CACHE = {'TIMEOUT': 60, 'STATELESS': True}
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19TokenClaims:
+
+    URL_TOKEN = '/api/v1/auth/token/'
+    USERS_URL = '/api/v1/users/'
+    USER_DETAIL_URL_TEMPLATE = '/api/v1/users/{username}/'
+    CATEGORIES_URL = '/api/v1/categories/'
+
+    def obtain_token(self, client, user):
+        type(user).objects.filter(pk=user.pk).update(
+            confirmation_code='AB123'
+        )
+        response = client.post(self.URL_TOKEN, data={
+            'username': user.username,
+            'confirmation_code': 'AB123',
+        })
+        assert response.status_code == 200
+        return response.json()['token']
+
+    def test_01_token_contains_claims(self, client, moderator):
+        token = AccessToken(self.obtain_token(client, moderator))
+        assert token['username'] == moderator.username
+        assert token['role'] == 'moderator'
+        assert token['is_superuser'] is False
+        assert token['token_version'] == 0, (
+            'Проверьте, что в access-токене есть роль, имя пользователя '
+            'и версия токенов.'
+        )
+
+    def test_02_stateless_mode_skips_user_query(self, client, admin,
+                                                stateless):
+        admin_client = client_with_token(self.obtain_token(client, admin))
+        response, queries = user_queries(admin_client, self.USERS_URL)
+        assert response.status_code == 200
+        response, queries = user_queries(admin_client, self.CATEGORIES_URL)
+        assert response.status_code == 200
+        assert not queries, (
+            'Проверьте, что в режиме STATELESS права проверяются по claims '
+            'токена без запроса пользователя из БД.'
+        )
+
+    @pytest.mark.parametrize('mode', ('cached', 'stateless'))
+    def test_03_role_downgrade_revokes_tokens(self, client, admin,
+                                              django_user_model, settings,
+                                              mode):
+        settings.AUTH_USER_CACHE = {
+            'TIMEOUT': 60, 'STATELESS': mode == 'stateless'
+        }
+        admin_client = client_with_token(self.obtain_token(client, admin))
+        other_admin = django_user_model.objects.create_user(
+            username='OtherAdmin', email='otheradmin@yamdb.fake',
+            role='admin'
+        )
+        other_admin_client = client_with_token(
+            self.obtain_token(client, other_admin)
+        )
+        assert admin_client.get(self.USERS_URL).status_code == 200
+
+        response = other_admin_client.patch(
+            self.USER_DETAIL_URL_TEMPLATE.format(username=admin.username),
+            data={'role': 'moderator'}
+        )
+        assert response.status_code == 200
+
+        response = admin_client.get(self.USERS_URL)
+        assert response.status_code == 401, (
+            'Проверьте, что после понижения роли ранее выданные '
+            'пользователю токены отзываются.'
+        )
+        admin_client = client_with_token(self.obtain_token(client, admin))
+        assert admin_client.get(self.USERS_URL).status_code == 403
+
+    def test_04_role_upgrade_keeps_tokens(self, client, user, admin_client,
+                                          stateless):
+        user_client = client_with_token(self.obtain_token(client, user))
+        response = admin_client.patch(
+            self.USER_DETAIL_URL_TEMPLATE.format(username=user.username),
+            data={'role': 'moderator'}
+        )
+        assert response.status_code == 200
+        assert user_client.get(self.USERS_URL + 'me/').status_code == 200
+
+    def test_05_stale_claims_not_saved(self, client, user, admin_client,
+                                       stateless):
+        user_client = client_with_token(self.obtain_token(client, user))
+        response = admin_client.patch(
+            self.USER_DETAIL_URL_TEMPLATE.format(username=user.username),
+            data={'role': 'moderator'}
+        )
+        assert response.status_code == 200
+
+        response = user_client.patch(
+            self.USERS_URL + 'me/', data={'bio': 'Новая биография'}
+        )
+        assert response.status_code == 200
+        user.refresh_from_db()
+        assert user.bio == 'Новая биография'
+        assert user.role == 'moderator', (
+            f'Проверьте, что PATCH-запрос к `{self.USERS_URL}me/` со старым '
+            'токеном не перезаписывает роль пользователя значением из claims.'
+        )
+        assert user.is_active
+
+    def test_06_token_version_cache_expires(self, client, user, stateless,
+                                            monkeypatch):
+        timeouts = {}
+        set_cache = authentication.cache.set
+
+        def record_set(key, value, timeout=None, *args, **kwargs):
+            timeouts[key] = timeout
+            return set_cache(key, value, timeout, *args, **kwargs)
+
+        monkeypatch.setattr(authentication.cache, 'set', record_set)
+        user_client = client_with_token(self.obtain_token(client, user))
+        assert user_client.get(self.CATEGORIES_URL).status_code == 200
+        key = authentication.get_token_version_cache_key(user.pk)
+        assert timeouts[key] == 60, (
+            'Проверьте, что версия токенов кэшируется на `TIMEOUT` из '
+            '`AUTH_USER_CACHE`, а не бессрочно: сброс ключа в одном '
+            'процессе не виден кэшам других процессов.'
+        )
@@ -0,0 +1,129 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+
+from users.models import OutgoingEmail
+
+
+class CountingBackend(EmailBackend):
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return super().open()
+
+
+class FailingBackend(EmailBackend):
+
+    def send_messages(self, messages):
+        if any(
+            recipient.startswith('broken')
+            for message in messages for recipient in message.to
+        ):
+            raise ConnectionError('Почтовый сервер недоступен')
+        return super().send_messages(messages)
+
+
+def send_emails(**options):
+    call_command(
+        'send_emails', stdout=StringIO(), stderr=StringIO(), **options
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20EmailOutbox:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+
+    def test_01_signup_queues_email(self, client):
+        response = client.post(self.URL_SIGNUP, data={
+            'email': 'queued@yamdb.fake', 'username': 'queued'
+        })
+        assert response.status_code == 200
+        assert not mail.outbox, (
+            f'Проверьте, что `{self.URL_SIGNUP}` не отправляет письмо '
+            'синхронно, а ставит его в очередь.'
+        )
+        email = OutgoingEmail.objects.get()
+        assert email.recipient == 'queued@yamdb.fake'
+        assert email.sent_at is None
+
+        send_emails()
+        assert len(mail.outbox) == 1
+        assert mail.outbox[0].to == ['queued@yamdb.fake']
+        email.refresh_from_db()
+        assert email.sent_at is not None
+
+        send_emails()
+        assert len(mail.outbox) == 1, (
+            'Проверьте, что отправленное письмо не отправляется повторно.'
+        )
+
+    def test_02_one_connection_per_batch(self, settings):
+        settings.EMAIL_BACKEND = (
+            'tests.test_20_email_outbox.CountingBackend'
+        )
+        CountingBackend.opened = 0
+        for idx in range(7):
+            OutgoingEmail.objects.create(
+                subject='Тема', body='Текст',
+                recipient=f'user{idx}@yamdb.fake'
+            )
+
+        send_emails(batch_size=3, workers=2)
+
+        assert len(mail.outbox) == 7
+        assert CountingBackend.opened == 3, (
+            'Проверьте, что каждая пачка писем отправляется через одно '
+            'соединение с почтовым сервером.'
+        )
+        assert not OutgoingEmail.objects.filter(sent_at__isnull=True).exists()
+
+    def test_03_failed_email_is_retried_with_backoff(self, settings):
+        settings.EMAIL_BACKEND = (
+            'tests.test_20_email_outbox.FailingBackend'
+        )
+        broken = OutgoingEmail.objects.create(
+            subject='Тема', body='Текст', recipient='broken@yamdb.fake'
+        )
+        OutgoingEmail.objects.create(
+            subject='Тема', body='Текст', recipient='fine@yamdb.fake'
+        )
+
+        send_emails(backoff=60)
+
+        assert [message.to for message in mail.outbox] == [
+            ['fine@yamdb.fake']
+        ], 'Проверьте, что ошибка одного письма не мешает отправке других.'
+        broken.refresh_from_db()
+        assert broken.sent_at is None
+        assert broken.attempts == 1
+        assert 'недоступен' in broken.last_error
+        assert broken.next_attempt_at > timezone.now() + timedelta(
+            seconds=50
+        ), 'Проверьте, что повторная попытка откладывается.'
+
+        OutgoingEmail.objects.filter(pk=broken.pk).update(
+            next_attempt_at=timezone.now()
+        )
+        send_emails(backoff=60)
+        broken.refresh_from_db()
+        assert broken.attempts == 2
+        assert broken.next_attempt_at > timezone.now() + timedelta(
+            seconds=110
+        ), 'Проверьте, что пауза между попытками растёт.'
+
+        OutgoingEmail.objects.filter(pk=broken.pk).update(
+            next_attempt_at=timezone.now()
+        )
+        send_emails(max_attempts=2)
+        broken.refresh_from_db()
+        assert broken.attempts == 2, (
+            'Проверьте, что после `--max-attempts` попыток письмо больше '
+            'не отправляется.'
+        )
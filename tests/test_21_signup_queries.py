@@ -0,0 +1,73 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from users.models import OutgoingEmail
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21SignupQueries:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+    DATA = {'email': 'signup@yamdb.fake', 'username': 'signup'}
+
+    def signup(self, client, data):
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(self.URL_SIGNUP, data=data)
+        queries = [
+            query['sql'] for query in context.captured_queries
+            if '"users_user"' in query['sql']
+        ]
+        return response, queries
+
+    def assert_queries(self, queries, expected, branch):
+        statements = [sql.split()[0] for sql in queries]
+        assert statements == expected, (
+            f'Проверьте, что при {branch} `{self.URL_SIGNUP}` обращается '
+            f'к таблице пользователей запросами {expected}. '
+            f'Сейчас: {statements}.'
+        )
+
+    def test_01_new_user(self, client, django_user_model):
+        response, queries = self.signup(client, self.DATA)
+        assert response.status_code == 200
+        self.assert_queries(
+            queries, ['SELECT', 'INSERT'], 'регистрации нового пользователя'
+        )
+        user = django_user_model.objects.get(username='signup')
+        assert user.confirmation_code
+        assert OutgoingEmail.objects.get().body.endswith(
+            user.confirmation_code
+        )
+
+    def test_02_repeat_signup(self, client, django_user_model):
+        self.signup(client, self.DATA)
+
+        response, queries = self.signup(client, self.DATA)
+        assert response.status_code == 200
+        self.assert_queries(
+            queries, ['SELECT', 'UPDATE'], 'повторной регистрации'
+        )
+        user = django_user_model.objects.get()
+        assert OutgoingEmail.objects.order_by('id').last().body.endswith(
+            user.confirmation_code
+        )
+        assert OutgoingEmail.objects.count() == 2
+
+    def test_03_email_taken(self, client):
+        self.signup(client, self.DATA)
+        response, queries = self.signup(
+            client, {**self.DATA, 'username': 'other'}
+        )
+        assert response.status_code == 400
+        assert 'email' in response.json()
+        self.assert_queries(queries, ['SELECT'], 'занятом email')
+
+    def test_04_username_taken(self, client):
+        self.signup(client, self.DATA)
+        response, queries = self.signup(
+            client, {**self.DATA, 'email': 'other@yamdb.fake'}
+        )
+        assert response.status_code == 400
+        assert 'username' in response.json()
+        self.assert_queries(queries, ['SELECT'], 'занятом username')
@@ -0,0 +1,59 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22TokenExchange:
+
+    URL_TOKEN = '/api/v1/auth/token/'
+
+    def test_01_code_consumed_with_single_column_update(self, client, user):
+        type(user).objects.filter(pk=user.pk).update(confirmation_code='AB123')
+        data = {'username': user.username, 'confirmation_code': 'AB123'}
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(self.URL_TOKEN, data=data)
+        assert response.status_code == 200
+
+        updates = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('UPDATE "users_user"')
+        ]
+        assert len(updates) == 1
+        set_clause = updates[0].split(' SET ')[1].split(' WHERE ')[0]
+        assert set_clause.count('=') == 1, (
+            'Проверьте, что код подтверждения гасится обновлением одной '
+            f'колонки. Сейчас: {updates[0]}'
+        )
+        assert 'WHERE' in updates[0] and '"confirmation_code"' in (
+            updates[0].split(' WHERE ')[1]
+        ), 'Проверьте, что UPDATE проверяет текущий код подтверждения.'
+
+        user.refresh_from_db()
+        assert user.confirmation_code == ''
+        assert user.bio == 'user bio'
+
+    def test_02_code_can_be_used_once(self, client, user):
+        type(user).objects.filter(pk=user.pk).update(confirmation_code='AB123')
+        data = {'username': user.username, 'confirmation_code': 'AB123'}
+
+        assert client.post(self.URL_TOKEN, data=data).status_code == 200
+        response = client.post(self.URL_TOKEN, data=data)
+        assert response.status_code == 400, (
+            'Проверьте, что код подтверждения нельзя использовать повторно.'
+        )
+
+    def test_03_wrong_code_keeps_stored_code(self, client, user):
+        type(user).objects.filter(pk=user.pk).update(confirmation_code='AB123')
+        response = client.post(self.URL_TOKEN, data={
+            'username': user.username, 'confirmation_code': 'ZZ999'
+        })
+        assert response.status_code == 400
+        user.refresh_from_db()
+        assert user.confirmation_code == 'AB123'
+
+        response = client.post(self.URL_TOKEN, data={
+            'username': 'missing', 'confirmation_code': 'AB123'
+        })
+        assert response.status_code == 404
@@ -0,0 +1,52 @@
+import timeit
+
+import pytest
+from django.core.validators import RegexValidator
+
+from api.serializers import SignUpSerializer
+
+
+class Test23UsernameValidators:
+
+    CALLS = 5000
+    # Бюджет с большим запасом: на типичной машине проверка занимает
+    # единицы микросекунд.
+    MAX_SECONDS_PER_CALL = 0.0001
+
+    def test_01_validators_are_not_rebuilt(self, monkeypatch):
+        created = []
+        init = RegexValidator.__init__
+
+        def counting_init(self, *args, **kwargs):
+            created.append(self)
+            init(self, *args, **kwargs)
+
+        monkeypatch.setattr(RegexValidator, '__init__', counting_init)
+        serializer = SignUpSerializer()
+        for _ in range(10):
+            serializer.validate_username('valid.user+1@name')
+
+        assert not created, (
+            'Проверьте, что валидаторы username создаются один раз '
+            'при импорте, а не при каждой проверке.'
+        )
+
+    def test_02_signup_validation_benchmark(self):
+        serializer = SignUpSerializer()
+        seconds = min(timeit.repeat(
+            lambda: serializer.validate_username('valid.user+1@name'),
+            number=self.CALLS,
+            repeat=3,
+        ))
+        assert seconds / self.CALLS < self.MAX_SECONDS_PER_CALL, (
+            'Проверка username при регистрации стала заметно медленнее: '
+            f'{seconds / self.CALLS * 1e6:.1f} мкс на вызов.'
+        )
+
+    @pytest.mark.parametrize('username', ('me', 'Me', 'bad name', 'bad#'))
+    def test_03_invalid_usernames(self, username):
+        serializer = SignUpSerializer(
+            data={'username': username, 'email': 'user@yamdb.fake'}
+        )
+        assert not serializer.is_valid()
+        assert 'username' in serializer.errors
@@ -0,0 +1,145 @@
+import pytest
+
+from api.throttling import (CacheBucketBackend, LocalBucketBackend,
+                            get_throttle_backend, take_token)
+from reviews.models import Category, Title
+
+
+@pytest.fixture
+def rates(settings):
+    def set_rates(backend='api.throttling.LocalBucketBackend', **rates):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': {
+                **settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'],
+                **rates,
+            },
+            'THROTTLE_BACKEND': backend,
+        }
+        get_throttle_backend().clear()
+    return set_rates
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24Throttling:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+    URL_TOKEN = '/api/v1/auth/token/'
+
+    def signup(self, client, idx, **extra):
+        return client.post(self.URL_SIGNUP, data={
+            'email': f'user{idx}@yamdb.fake', 'username': f'user{idx}',
+        }, **extra)
+
+    @pytest.mark.parametrize('backend', (
+        'api.throttling.LocalBucketBackend',
+        'api.throttling.CacheBucketBackend',
+    ))
+    def test_01_signup_limited_per_ip(self, client, rates, backend):
+        rates(backend=backend, signup='3/hour')
+        for idx in range(3):
+            assert self.signup(client, idx).status_code == 200
+        response = self.signup(client, 3)
+        assert response.status_code == 429, (
+            f'Проверьте, что `{self.URL_SIGNUP}` ограничивает количество '
+            'запросов с одного адреса.'
+        )
+        assert int(response['Retry-After']) > 0
+
+        response = self.signup(client, 4, REMOTE_ADDR='10.0.0.2')
+        assert response.status_code == 200, (
+            'Проверьте, что лимит считается отдельно для каждого адреса.'
+        )
+
+    def test_02_signup_limited_per_email(self, client, rates):
+        rates(signup='2/hour')
+        for idx in range(2):
+            response = self.signup(
+                client, 0, REMOTE_ADDR=f'10.0.1.{idx}'
+            )
+            assert response.status_code == 200
+        response = self.signup(client, 0, REMOTE_ADDR='10.0.1.100')
+        assert response.status_code == 429, (
+            'Проверьте, что повторные регистрации одного email '
+            'ограничиваются независимо от адреса клиента.'
+        )
+
+    def test_03_token_limited_per_username(self, client, rates, user):
+        rates(token='2/hour')
+        data = {'username': user.username, 'confirmation_code': 'WRONG'}
+        for idx in range(2):
+            response = client.post(
+                self.URL_TOKEN, data=data, REMOTE_ADDR=f'10.0.2.{idx}'
+            )
+            assert response.status_code == 400
+        response = client.post(
+            self.URL_TOKEN, data=data, REMOTE_ADDR='10.0.2.100'
+        )
+        assert response.status_code == 429, (
+            'Проверьте, что подбор кода подтверждения для одного '
+            'пользователя ограничивается.'
+        )
+
+    def test_04_review_writes_limited(self, user_client, rates):
+        rates(reviews='2/min')
+        category = Category.objects.create(name='Фильм', slug='films')
+        titles = [
+            Title.objects.create(name=f'Фильм {idx}', year=2000,
+                                 category=category)
+            for idx in range(3)
+        ]
+        for title in titles[:2]:
+            response = user_client.post(
+                f'/api/v1/titles/{title.id}/reviews/',
+                data={'text': 'Отзыв', 'score': 5}
+            )
+            assert response.status_code == 201
+        response = user_client.post(
+            f'/api/v1/titles/{titles[2].id}/reviews/',
+            data={'text': 'Отзыв', 'score': 5}
+        )
+        assert response.status_code == 429, (
+            'Проверьте, что создание отзывов ограничено по частоте.'
+        )
+        response = user_client.get(f'/api/v1/titles/{titles[0].id}/reviews/')
+        assert response.status_code == 200, (
+            'Проверьте, что чтение отзывов не ограничивается.'
+        )
+
+    @pytest.mark.parametrize('url', (URL_SIGNUP, URL_TOKEN))
+    def test_05_non_object_body(self, client, url):
+        response = client.post(
+            url, data='[1, 2]', content_type='application/json'
+        )
+        assert response.status_code == 400, (
+            f'Проверьте, что POST-запрос к `{url}` с телом-списком '
+            'возвращает ошибку валидации, а не ошибку сервера.'
+        )
+
+
+class Test24TokenBucket:
+
+    def test_01_bucket_refills(self):
+        state, wait = take_token(None, 2, 1, now=0)
+        state, wait = take_token(state, 2, 1, now=0)
+        assert wait is None
+        state, wait = take_token(state, 2, 1, now=0)
+        assert wait == pytest.approx(1)
+        state, wait = take_token(state, 2, 1, now=1)
+        assert wait is None
+
+    @pytest.mark.parametrize('backend_class', (
+        LocalBucketBackend, CacheBucketBackend
+    ))
+    def test_02_backends(self, backend_class):
+        backend = backend_class()
+        backend.clear()
+        assert backend.consume('key', 1, 0.001) is None
+        assert backend.consume('key', 1, 0.001) > 0
+        assert backend.consume('other', 1, 0.001) is None
+
+    def test_03_local_backend_is_bounded(self):
+        backend = LocalBucketBackend(max_entries=2)
+        for idx in range(5):
+            backend.consume(str(idx), 1, 1)
+        assert list(backend.buckets) == ['3', '4']
@@ -0,0 +1,105 @@
+import pytest
+
+from reviews.models import Category, Genre, Title
+from reviews.search import get_search_backend
+
+
+@pytest.fixture
+def catalog():
+    # Индекс не входит в таблицы моделей и не очищается между тестами.
+    get_search_backend().rebuild()
+    films = Category.objects.create(name='Фильм', slug='films')
+    books = Category.objects.create(name='Книга', slug='books')
+    drama = Genre.objects.create(name='Драма', slug='drama')
+    comedy = Genre.objects.create(name='Комедия', slug='comedy')
+    titles = {
+        'war': Title.objects.create(
+            name='Война и мир', year=1869, category=books,
+            description='Роман-эпопея'
+        ),
+        'peace': Title.objects.create(
+            name='Тихий Дон', year=1940, category=books,
+            description='Роман о войне и мире на Дону'
+        ),
+        'comedy': Title.objects.create(
+            name='Иван Васильевич меняет профессию', year=1973,
+            category=films, description='Комедия о машине времени'
+        ),
+    }
+    titles['war'].genre.set([drama])
+    titles['peace'].genre.set([drama])
+    titles['comedy'].genre.set([comedy])
+    return titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25TitleSearch:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def search(self, client, query, **params):
+        response = client.get(
+            self.TITLES_URL, data={'search': query, **params}
+        )
+        assert response.status_code == 200
+        return [title['name'] for title in response.json()['results']]
+
+    def test_01_search_ranks_name_matches_first(self, client, catalog):
+        assert self.search(client, 'войн') == ['Война и мир', 'Тихий Дон'], (
+            f'Проверьте, что `{self.TITLES_URL}?search=` ищет по названию '
+            'и описанию, а совпадения в названии идут первыми.'
+        )
+
+    def test_02_search_by_genre_and_category(self, client, catalog):
+        assert self.search(client, 'драма книга') == [
+            'Война и мир', 'Тихий Дон'
+        ]
+        assert self.search(client, 'фильм') == [
+            'Иван Васильевич меняет профессию'
+        ]
+        assert self.search(client, 'драма фильм') == []
+
+    def test_03_explicit_ordering_wins(self, client, catalog):
+        assert self.search(client, 'роман', ordering='-year') == [
+            'Тихий Дон', 'Война и мир'
+        ]
+
+    def test_04_index_follows_changes(self, client, catalog):
+        genre = Genre.objects.get(slug='comedy')
+        genre.name = 'Фантастика'
+        genre.save()
+        assert self.search(client, 'фантастика') == [
+            'Иван Васильевич меняет профессию'
+        ], 'Проверьте, что переименование жанра обновляет индекс.'
+
+        title = catalog['war']
+        title.genre.clear()
+        assert self.search(client, 'драма') == ['Тихий Дон']
+
+        Category.objects.get(slug='books').delete()
+        assert self.search(client, 'книга') == []
+
+        catalog['comedy'].delete()
+        assert self.search(client, 'иван') == []
+
+    def test_05_search_query_is_escaped(self, client, catalog):
+        for query in ('"', 'NEAR(', '*', 'войн OR'):
+            response = client.get(self.TITLES_URL, data={'search': query})
+            assert response.status_code == 200
+
+    def test_06_truncated_results_reported(self, client, catalog,
+                                           monkeypatch):
+        data = client.get(self.TITLES_URL, {'search': 'роман'}).json()
+        assert data['count'] == 2
+        assert data['search_truncated'] is False
+
+        monkeypatch.setattr('api.filters.SEARCH_MAX_RESULTS', 1)
+        # Другие параметры запроса не дают взять ответ из кэша.
+        data = client.get(
+            self.TITLES_URL, {'search': 'роман', 'limit': 10}
+        ).json()
+        assert data['count'] == 1
+        assert data['search_truncated'] is True, (
+            'Проверьте, что ответ на поиск сообщает в `search_truncated`, '
+            'что часть совпадений не вошла в выдачу.'
+        )
@@ -0,0 +1,122 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.autocomplete import autocomplete_index
+from api.cache import bump_generation
+from reviews.models import Category, Genre, Title
+
+
+@pytest.fixture
+def catalog():
+    books = Category.objects.create(name='Книги', slug='books')
+    Genre.objects.create(name='Военная проза', slug='war-prose')
+    Title.objects.create(name='Война и мир', year=1869, category=books)
+    Title.objects.create(name='Волшебник Изумрудного города', year=1939,
+                         category=books)
+    Title.objects.create(name='Тихий Дон', year=1940, category=books)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26Autocomplete:
+
+    URL = '/api/v1/autocomplete/'
+
+    def names(self, client, **params):
+        response = client.get(self.URL, data=params)
+        assert response.status_code == 200
+        return [item['name'] for item in response.json()]
+
+    def test_01_prefix_matches(self, client, catalog):
+        assert self.names(client, q='во') == [
+            'Военная проза', 'Война и мир', 'Волшебник Изумрудного города'
+        ], (
+            f'Проверьте, что `{self.URL}` возвращает произведения, жанры '
+            'и категории, названия которых начинаются с запроса.'
+        )
+        assert self.names(client, q='МИР') == ['Война и мир'], (
+            'Проверьте, что поиск не зависит от регистра и учитывает '
+            'начало каждого слова.'
+        )
+        assert self.names(client, q='во', limit=1) == ['Военная проза']
+        assert self.names(client, q='во', type='title') == [
+            'Война и мир', 'Волшебник Изумрудного города'
+        ]
+        assert self.names(client, q='') == []
+
+        assert self.names(client, q='кни') == ['Книги']
+        item = client.get(self.URL, data={'q': 'кни'}).json()[0]
+        assert item == {
+            'id': Category.objects.get().id,
+            'name': 'Книги',
+            'slug': 'books',
+            'type': 'category',
+        }
+
+    def test_02_warm_index_does_not_query_db(self, client, catalog):
+        self.names(client, q='во')
+        with CaptureQueriesContext(connection) as context:
+            self.names(client, q='тих')
+        assert not context.captured_queries, (
+            'Проверьте, что подсказки берутся из индекса в памяти '
+            'без запросов к БД.'
+        )
+
+    def test_03_index_updated_incrementally(self, client, catalog):
+        self.names(client, q='во')
+        title = Title.objects.get(name='Тихий Дон')
+        title.name = 'Воскресение'
+        title.save()
+        Genre.objects.get().delete()
+
+        with CaptureQueriesContext(connection) as context:
+            names = self.names(client, q='во')
+        assert names == [
+            'Война и мир', 'Волшебник Изумрудного города', 'Воскресение'
+        ]
+        assert not context.captured_queries, (
+            'Проверьте, что изменения применяются к индексу без его '
+            'полной перестройки.'
+        )
+        assert self.names(client, q='тих') == []
+
+    def test_04_foreign_changes_rebuild_index(self, client, catalog):
+        self.names(client, q='во')
+        # Изменение, сделанное в обход сигналов этого процесса.
+        Title.objects.filter(name='Тихий Дон').update(name='Вишнёвый сад')
+        bump_generation(Title, scope=autocomplete_index.GENERATION_SCOPE)
+
+        with CaptureQueriesContext(connection) as context:
+            self.names(client, q='вишневый')
+        assert not context.captured_queries, (
+            'Проверьте, что устаревший индекс перестраивается вне запроса, '
+            'а запрос получает прежние подсказки.'
+        )
+        autocomplete_index.wait()
+        assert self.names(client, q='вишневый') == ['Вишнёвый сад']
+        assert autocomplete_index.generations is not None
+
+    def test_05_genre_changes_keep_index(self, client, admin_client,
+                                         catalog, monkeypatch):
+        self.names(client, q='во')
+        rebuilds = []
+        rebuild = autocomplete_index.rebuild
+        monkeypatch.setattr(
+            autocomplete_index, 'rebuild',
+            lambda generations: rebuilds.append(generations) or rebuild(
+                generations
+            )
+        )
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Воскресение', 'year': 1899, 'category': 'books',
+            'genre': ['war-prose'],
+        })
+        assert response.status_code == 201
+        Title.objects.get(name='Тихий Дон').genre.clear()
+
+        assert self.names(client, q='воск') == ['Воскресение']
+        autocomplete_index.wait()
+        assert not rebuilds, (
+            'Проверьте, что создание произведения и смена его жанров '
+            'обновляют индекс подсказок без полной перестройки.'
+        )
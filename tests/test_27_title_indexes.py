@@ -0,0 +1,60 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.test_09_title_queries import create_catalog
+
+
+def explain_title_list(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    sql = next(
+        query['sql'] for query in context.captured_queries
+        if query['sql'].startswith('SELECT')
+        and 'FROM "reviews_title"' in query['sql']
+        and 'ORDER BY' in query['sql']
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return ' | '.join(row[-1] for row in cursor.fetchall())
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27TitleIndexes:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    @pytest.fixture(autouse=True)
+    def sqlite_only(self):
+        if connection.vendor != 'sqlite':
+            pytest.skip('План запроса проверяется на SQLite.')
+
+    @pytest.mark.parametrize('params,index', (
+        ('', 'title_name_year_idx'),
+        ('?year=2000', 'title_year_name_idx'),
+        ('?category=films', 'title_category_name_idx'),
+    ))
+    def test_01_list_ordered_by_index(self, client, admin, params, index):
+        create_catalog(3, admin)
+        plan = explain_title_list(client, self.TITLES_URL + params)
+        assert index in plan, (
+            f'Проверьте, что запрос `{self.TITLES_URL}{params}` использует '
+            f'индекс `{index}`. План: {plan}'
+        )
+        assert 'TEMP B-TREE' not in plan, (
+            f'Проверьте, что список `{self.TITLES_URL}{params}` '
+            f'сортируется по индексу, а не во временном дереве. План: {plan}'
+        )
+
+    def test_02_genre_filter_uses_through_index(self, client, admin):
+        create_catalog(3, admin)
+        plan = explain_title_list(client, self.TITLES_URL + '?genre=drama')
+        assert 'COVERING INDEX' in plan.split('reviews_category')[0], (
+            'Проверьте, что фильтр по жанру проверяется по индексу '
+            f'промежуточной таблицы без чтения строк. План: {plan}'
+        )
+        assert 'TEMP B-TREE' not in plan, (
+            'Проверьте, что список с фильтром по жанру сортируется '
+            f'по индексу. План: {plan}'
+        )
@@ -0,0 +1,88 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, Genre, Title
+
+
+@pytest.fixture
+def catalog():
+    films = Category.objects.create(name='Фильм', slug='films')
+    books = Category.objects.create(name='Книга', slug='books')
+    drama = Genre.objects.create(name='Драма', slug='drama')
+    comedy = Genre.objects.create(name='Комедия', slug='comedy')
+    Genre.objects.create(name='Ужасы', slug='horror')
+    titles = (
+        ('Драма', films, [drama]),
+        ('Комедия', films, [comedy]),
+        ('Трагикомедия', books, [drama, comedy]),
+    )
+    for name, category, genres in titles:
+        Title.objects.create(
+            name=name, year=2000, category=category
+        ).genre.set(genres)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28TitleSlugFilters:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def names(self, client, query):
+        response = client.get(self.TITLES_URL + query)
+        assert response.status_code == 200
+        return [title['name'] for title in response.json()['results']]
+
+    def test_01_single_slug(self, client, catalog):
+        assert self.names(client, '?genre=drama') == [
+            'Драма', 'Трагикомедия'
+        ]
+        assert self.names(client, '?category=books') == ['Трагикомедия']
+        assert self.names(client, '?genre=unknown') == []
+        assert self.names(client, '?category=unknown') == []
+
+    def test_02_multiple_genres(self, client, catalog):
+        assert self.names(client, '?genre=drama,comedy') == [
+            'Драма', 'Комедия', 'Трагикомедия'
+        ], 'Проверьте, что по умолчанию подходит любой из жанров.'
+        assert self.names(
+            client, '?genre=drama,comedy&genre_match=all'
+        ) == ['Трагикомедия'], (
+            'Проверьте, что с `genre_match=all` подходят произведения '
+            'со всеми перечисленными жанрами.'
+        )
+        assert self.names(client, '?genre=drama,unknown') == [
+            'Драма', 'Трагикомедия'
+        ]
+        assert self.names(
+            client, '?genre=drama,unknown&genre_match=all'
+        ) == []
+        assert self.names(client, '?genre=drama,horror&genre_match=all') == []
+        response = client.get(self.TITLES_URL + '?genre_match=some')
+        assert response.status_code == 400
+
+    def test_03_multiple_categories(self, client, catalog):
+        assert self.names(client, '?category=films,books') == [
+            'Драма', 'Комедия', 'Трагикомедия'
+        ]
+
+    def test_04_slugs_resolved_without_joins(self, client, catalog):
+        self.names(client, '?genre=drama&category=films')
+        with CaptureQueriesContext(connection) as context:
+            names = self.names(
+                client, '?genre=drama,comedy&category=films&page=1'
+            )
+        assert names == ['Драма', 'Комедия']
+        assert not any(
+            '"slug" =' in query['sql'] or '"slug" IN' in query['sql']
+            for query in context.captured_queries
+        ), (
+            'Проверьте, что slug жанров и категорий переводятся в id до '
+            'запроса списка произведений.'
+        )
+
+    def test_05_new_genre_is_resolved(self, client, catalog):
+        assert self.names(client, '?genre=western') == []
+        western = Genre.objects.create(name='Вестерн', slug='western')
+        Title.objects.create(name='Дилижанс', year=1939).genre.add(western)
+        assert self.names(client, '?genre=western') == ['Дилижанс']
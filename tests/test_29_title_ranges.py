@@ -0,0 +1,99 @@
+import pytest
+from django.db import connection
+
+from reviews.models import Category, Review, Title
+from tests.test_27_title_indexes import explain_title_list
+
+
+@pytest.fixture
+def catalog(admin, user, moderator):
+    category = Category.objects.create(name='Фильм', slug='films')
+    scores = {
+        ('Фильм 1985', 1985): (9, 8),
+        ('Фильм 1995', 1995): (9, 10, 8),
+        ('Фильм 1999', 1999): (6,),
+        ('Фильм 2005', 2005): (10,),
+        ('Фильм 1990', 1990): (),
+    }
+    authors = (admin, user, moderator)
+    for (name, year), title_scores in scores.items():
+        title = Title.objects.create(name=name, year=year, category=category)
+        for author, score in zip(authors, title_scores):
+            Review.objects.create(
+                title=title, author=author, text='Отзыв', score=score
+            )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test29TitleRanges:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def names(self, client, query):
+        response = client.get(self.TITLES_URL + query)
+        assert response.status_code == 200
+        return [title['name'] for title in response.json()['results']]
+
+    def test_01_year_range(self, client, catalog):
+        assert self.names(client, '?year_min=1990&year_max=2000') == [
+            'Фильм 1990', 'Фильм 1995', 'Фильм 1999'
+        ], 'Проверьте фильтры `year_min` и `year_max`.'
+
+    def test_02_rating_range(self, client, catalog):
+        assert self.names(client, '?rating_min=8') == [
+            'Фильм 1985', 'Фильм 1995', 'Фильм 2005'
+        ], 'Проверьте фильтр `rating_min`.'
+        assert self.names(client, '?rating_min=8&rating_max=9') == [
+            'Фильм 1985', 'Фильм 1995'
+        ], 'Проверьте фильтр `rating_max`.'
+        assert self.names(
+            client, '?year_min=1990&year_max=2000&rating_min=8'
+        ) == ['Фильм 1995']
+
+    def test_03_ordering_by_rating_and_reviews_count(self, client, catalog):
+        assert self.names(client, '?ordering=-rating&rating_min=1') == [
+            'Фильм 2005', 'Фильм 1995', 'Фильм 1985', 'Фильм 1999'
+        ], 'Проверьте сортировку `ordering=-rating`.'
+        assert self.names(client, '?ordering=rating&rating_min=1') == [
+            'Фильм 1999', 'Фильм 1985', 'Фильм 1995', 'Фильм 2005'
+        ], 'Проверьте сортировку `ordering=rating`.'
+        assert self.names(client, '?ordering=-reviews_count')[:2] == [
+            'Фильм 1995', 'Фильм 1985'
+        ], 'Проверьте сортировку `ordering=-reviews_count`.'
+
+    def test_04_rating_uses_index(self, client, catalog):
+        if connection.vendor != 'sqlite':
+            pytest.skip('План запроса проверяется на SQLite.')
+        plan = explain_title_list(
+            client, self.TITLES_URL + '?rating_min=8&ordering=-rating'
+        )
+        assert 'title_rating_idx' in plan, (
+            'Проверьте, что фильтр и сортировка по рейтингу используют '
+            f'индекс по хранимому рейтингу. План: {plan}'
+        )
+        assert 'TEMP B-TREE' not in plan, plan
+        assert 'GROUP BY' not in plan and 'reviews_review' not in plan, (
+            'Проверьте, что рейтинг не вычисляется агрегатом по отзывам. '
+            f'План: {plan}'
+        )
+
+    def test_05_rating_filter_count_follows_reviews(self, client, admin):
+        title = Title.objects.create(name='Фильм', year=2000)
+        data = client.get(self.TITLES_URL, {'rating_min': 5}).json()
+        assert data['count'] == 0
+
+        Review.objects.create(title=title, author=admin, text='Отзыв', score=8)
+        data = client.get(self.TITLES_URL, {'rating_min': 5}).json()
+        assert data['count'] == 1, (
+            'Проверьте, что количество в списке с фильтром по рейтингу '
+            'обновляется после нового отзыва.'
+        )
+        assert [item['id'] for item in data['results']] == [title.pk]
+
+    @pytest.mark.parametrize('ordering', ('rating', '-rating'))
+    def test_06_unrated_titles_last(self, client, catalog, ordering):
+        names = self.names(client, f'?ordering={ordering}')
+        assert names[-1] == 'Фильм 1990', (
+            f'Проверьте, что при сортировке `ordering={ordering}` '
+            'произведения без отзывов идут в конце списка.'
+        )